@@ -10,6 +10,8 @@ from .followers import router as followers_router
 from .shopping_list import router as shopping_list_router
 from .subscriptions import router as subscriptions_router
 from .files import router as files_router
+from .feed import router as feed_router
+from .runtime import router as runtime_router
 
 router = APIRouter(prefix="/v1")
 router.include_router(auth_router, tags=["auth"])
@@ -21,4 +23,6 @@ router.include_router(followers_router, tags=["followers"])
 router.include_router(shopping_list_router, tags=["shopping-list"])
 router.include_router(subscriptions_router, tags=["subscriptions"])
 router.include_router(files_router, tags=["files"])
+router.include_router(feed_router, tags=["feed"])
 router.include_router(tags_router, tags=["tags"])
+router.include_router(runtime_router, tags=["runtime"])
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends, status
 
-from app.db import get_connection
+from app.db import get_connection, get_read_connection
 from app.schemas import LoginRequest, TokenResponse, UserCreate
 from app.services.auth import login_user, register_user
 
@@ -15,5 +15,5 @@ async def register(payload: UserCreate, connection=Depends(get_connection)):
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(payload: LoginRequest, connection=Depends(get_connection)):
+async def login(payload: LoginRequest, connection=Depends(get_read_connection)):
     return await login_user(connection, payload.email, payload.password)
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 
-from app.db import get_connection
+from app.db import get_read_connection
 from app.dependencies.auth import get_current_user
 from app.schemas import FavoritesListResponse
 from app.services.favorites import list_favorites
+from app.services.recipes import export_favorite_recipes
 
 router = APIRouter(prefix="/favorites")
 
@@ -15,8 +17,16 @@ async def get_favorites(
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
-    connection=Depends(get_connection),
+    cursor: str | None = None,
+    connection=Depends(get_read_connection),
     current_user=Depends(get_current_user),
 ):
-    favorites = await list_favorites(connection, current_user["id"], q=q, limit=limit, offset=offset)
-    return FavoritesListResponse(count=len(favorites), favorites=favorites)
+    favorites, next_cursor = await list_favorites(
+        connection, current_user["id"], q=q, limit=limit, offset=offset, cursor=cursor
+    )
+    return FavoritesListResponse(count=len(favorites), favorites=favorites, next_cursor=next_cursor)
+
+
+@router.get("/export")
+async def export_favorites(current_user=Depends(get_current_user)):
+    return StreamingResponse(export_favorite_recipes(current_user["id"]), media_type="application/x-ndjson")
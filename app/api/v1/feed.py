@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+from pydantic import TypeAdapter
+
+from app.core.serialization import json_response
+from app.db import get_read_connection
+from app.dependencies.auth import get_current_user
+from app.schemas import FeedResponse, FeedRow
+from app.services.recipes import list_feed
+
+router = APIRouter(prefix="/feed")
+
+FEED_JSON = TypeAdapter(FeedRow)
+
+
+@router.get("", response_model=FeedResponse)
+async def get_feed(
+    limit: int = 50,
+    offset: int = 0,
+    cursor: str | None = None,
+    connection=Depends(get_read_connection),
+    current_user=Depends(get_current_user),
+):
+    recipes, next_cursor = await list_feed(connection, current_user["id"], limit=limit, offset=offset, cursor=cursor)
+    return json_response(FEED_JSON, {"count": len(recipes), "recipes": recipes, "next_cursor": next_cursor})
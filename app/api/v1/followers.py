@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Depends
 
-from app.db import get_connection
+from app.db import get_read_connection
 from app.dependencies.auth import get_current_user
 from app.schemas import FollowersResponse, User
 from app.services.subscriptions import list_followers
@@ -15,10 +15,13 @@ async def get_followers(
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
-    connection=Depends(get_connection),
+    cursor: str | None = None,
+    connection=Depends(get_read_connection),
     current_user=Depends(get_current_user),
 ):
-    followers = await list_followers(connection, current_user["id"], q=q, limit=limit, offset=offset)
+    followers, next_cursor = await list_followers(
+        connection, current_user["id"], q=q, limit=limit, offset=offset, cursor=cursor
+    )
     users = [
         User(
             id=item["user_id"],
@@ -29,4 +32,4 @@ async def get_followers(
         )
         for item in followers
     ]
-    return FollowersResponse(count=len(users), followers=users)
+    return FollowersResponse(count=len(users), followers=users, next_cursor=next_cursor)
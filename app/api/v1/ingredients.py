@@ -2,9 +2,9 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
 
-from app.db import get_connection
+from app.db import get_read_connection
 from app.schemas import Ingredient, IngredientStatsResponse
 from app.services.ingredients import get_ingredient_stats, list_ingredients
 
@@ -13,18 +13,26 @@ router = APIRouter(prefix="/ingredients")
 
 @router.get("", response_model=List[Ingredient])
 async def get_ingredients(
+    response: Response,
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
     sort: str | None = None,
-    connection=Depends(get_connection),
+    search: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    connection=Depends(get_read_connection),
 ):
-    return await list_ingredients(connection, q=q, limit=limit, offset=offset, sort=sort)
+    ingredients, etag = await list_ingredients(
+        connection, q=q, limit=limit, offset=offset, sort=sort, search=search, if_none_match=if_none_match
+    )
+    if etag:
+        response.headers["ETag"] = etag
+    return ingredients
 
 
 @router.get("/{ingredient_id}/statistics", response_model=IngredientStatsResponse)
 async def get_ingredient_statistics(
     ingredient_id: int,
-    connection=Depends(get_connection),
+    connection=Depends(get_read_connection),
 ):
     return await get_ingredient_stats(connection, ingredient_id)
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from pydantic import TypeAdapter
 
-from app.db import get_connection
+from app.core.serialization import json_response
+from app.db import get_connection, get_read_connection
 from app.dependencies.auth import get_current_user
 from app.schemas import (
     Comment,
@@ -16,6 +18,7 @@ from app.schemas import (
     Recipe,
     RecipeCreate,
     RecipeUpdate,
+    RecipeRow,
     RecipeStatsResponse,
 )
 from app.services.comments import create_comment, delete_comment, list_comments, update_comment
@@ -28,6 +31,9 @@ from app.services.files import process_image_input
 
 router = APIRouter(prefix="/recipes")
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+RECIPE_LIST_JSON = TypeAdapter(List[RecipeRow])
+
 
 @router.get("", response_model=List[Recipe])
 async def get_recipes(
@@ -35,14 +41,27 @@ async def get_recipes(
     limit: int = 50,
     offset: int = 0,
     sort: str | None = None,
-    connection=Depends(get_connection),
+    cursor: str | None = None,
+    search: str | None = None,
+    connection=Depends(get_read_connection),
 ):
-    return await list_recipes(connection, q=q, limit=limit, offset=offset, sort=sort)
+    recipes, next_cursor = await list_recipes(
+        connection, q=q, limit=limit, offset=offset, sort=sort, cursor=cursor, search=search
+    )
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return json_response(RECIPE_LIST_JSON, recipes, headers=headers)
 
 
 @router.get("/{recipe_id}", response_model=Recipe)
-async def get_recipe(recipe_id: int, connection=Depends(get_connection)):
-    return await get_recipe_or_404(connection, recipe_id)
+async def get_recipe(
+    recipe_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    connection=Depends(get_read_connection),
+):
+    recipe, etag = await get_recipe_or_404(connection, recipe_id, if_none_match=if_none_match)
+    response.headers["ETag"] = etag
+    return recipe
 
 
 @router.post("", response_model=Recipe, status_code=status.HTTP_201_CREATED)
@@ -109,12 +128,17 @@ async def delete_recipe_endpoint(
 @router.get("/{recipe_id}/comments", response_model=List[Comment])
 async def get_recipe_comments(
     recipe_id: int,
+    response: Response,
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
-    connection=Depends(get_connection),
+    cursor: str | None = None,
+    connection=Depends(get_read_connection),
 ):
-    return await list_comments(connection, recipe_id, q=q, limit=limit, offset=offset)
+    comments, next_cursor = await list_comments(connection, recipe_id, q=q, limit=limit, offset=offset, cursor=cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return comments
 
 
 @router.post("/{recipe_id}/comments", response_model=Comment, status_code=status.HTTP_201_CREATED)
@@ -205,17 +229,18 @@ async def get_recipe_ratings(
     recipe_id: int,
     limit: int = 50,
     offset: int = 0,
-    connection=Depends(get_connection),
+    cursor: str | None = None,
+    connection=Depends(get_read_connection),
 ):
-    ratings = await list_ratings(connection, recipe_id, limit=limit, offset=offset)
+    ratings, next_cursor = await list_ratings(connection, recipe_id, limit=limit, offset=offset, cursor=cursor)
     avg_rate = await get_avg_rate(connection, recipe_id)
-    return RatingsResponse(avg_rate=round(avg_rate, 2), ratings=ratings)
+    return RatingsResponse(avg_rate=round(avg_rate, 2), ratings=ratings, next_cursor=next_cursor)
 
 
 @router.get("/{recipe_id}/statistics", response_model=RecipeStatsResponse)
 async def get_recipe_statistics(
     recipe_id: int,
-    connection=Depends(get_connection),
+    connection=Depends(get_read_connection),
 ):
     return await get_recipe_stats(connection, recipe_id)
 
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+
+from app.dependencies.auth import get_current_user
+from app.schemas import RuntimeStatsResponse
+from app.services.runtime import get_runtime_stats
+
+router = APIRouter(prefix="/runtime")
+
+
+@router.get("/stats", response_model=RuntimeStatsResponse)
+async def runtime_stats(current_user=Depends(get_current_user)):
+    return get_runtime_stats()
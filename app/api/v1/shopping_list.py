@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 
-from app.db import get_connection
+from app.db import get_read_connection
 from app.dependencies.auth import get_current_user
 from app.schemas import ShoppingListResponse
-from app.services.shopping_list import list_items
+from app.services.shopping_list import get_download, list_items
 
 router = APIRouter(prefix="/shopping-list")
 
@@ -15,8 +16,23 @@ async def get_shopping_list(
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
-    connection=Depends(get_connection),
+    cursor: str | None = None,
+    connection=Depends(get_read_connection),
     current_user=Depends(get_current_user),
 ):
-    items = await list_items(connection, current_user["id"], q=q, limit=limit, offset=offset)
-    return ShoppingListResponse(count=len(items), shopping_list=items)
+    items, next_cursor = await list_items(connection, current_user["id"], q=q, limit=limit, offset=offset, cursor=cursor)
+    return ShoppingListResponse(count=len(items), shopping_list=items, next_cursor=next_cursor)
+
+
+@router.get("/download")
+async def download_shopping_list(
+    format: str = "txt",
+    connection=Depends(get_read_connection),
+    current_user=Depends(get_current_user),
+):
+    content, media_type = await get_download(connection, current_user["id"], format)
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="shopping_list.{format}"'},
+    )
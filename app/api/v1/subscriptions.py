@@ -4,7 +4,7 @@ from typing import List
 
 from fastapi import APIRouter, Depends, status
 
-from app.db import get_connection
+from app.db import get_connection, get_read_connection
 from app.dependencies.auth import get_current_user
 from app.schemas import FollowersResponse, Subscription, SubscriptionCreate, SubscriptionsResponse, User
 from app.services.subscriptions import delete_item, list_followers, list_items, upsert_item
@@ -17,10 +17,11 @@ async def get_subscriptions(
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
-    connection=Depends(get_connection),
+    cursor: str | None = None,
+    connection=Depends(get_read_connection),
     current_user=Depends(get_current_user),
 ):
-    subs = await list_items(connection, current_user["id"], q=q, limit=limit, offset=offset)
+    subs, next_cursor = await list_items(connection, current_user["id"], q=q, limit=limit, offset=offset, cursor=cursor)
     users = [
         User(
             id=item["following_id"],
@@ -31,7 +32,7 @@ async def get_subscriptions(
         )
         for item in subs
     ]
-    return SubscriptionsResponse(count=len(users), subscriptions=users)
+    return SubscriptionsResponse(count=len(users), subscriptions=users, next_cursor=next_cursor)
 
 
 @router.post("", response_model=Subscription, status_code=status.HTTP_201_CREATED)
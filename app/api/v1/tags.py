@@ -2,9 +2,9 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
 
-from app.db import get_connection
+from app.db import get_read_connection
 from app.schemas import Tag
 from app.services.tags import list_tags
 
@@ -13,9 +13,16 @@ router = APIRouter(prefix="/tags")
 
 @router.get("", response_model=List[Tag])
 async def get_tags(
+    response: Response,
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
-    connection=Depends(get_connection),
+    search: str | None = None,
+    if_none_match: str | None = Header(default=None),
+    connection=Depends(get_read_connection),
 ):
-    return await list_tags(connection, q=q, limit=limit, offset=offset)
+    tags, etag = await list_tags(
+        connection, q=q, limit=limit, offset=offset, search=search, if_none_match=if_none_match
+    )
+    response.headers["ETag"] = etag
+    return tags
@@ -2,32 +2,50 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 
-from app.db import get_connection
+from app.core.serialization import json_response
+from app.db import get_connection, get_read_connection
 from app.dependencies.auth import get_current_user
-from app.schemas import Recipe, Subscription, User, UserRecipesResponse, UserStatsResponse, UserUpdate
-from app.services.recipes import list_user_recipes
-from app.services.users import get_current_user_profile, get_user_or_404, get_user_stats, list_users, update_current_user
+from app.schemas import Recipe, Subscription, User, UserRecipesResponse, UserRecipesRow, UserStatsResponse, UserUpdate
+from app.services.recipes import export_user_recipes, list_user_recipes
+from app.services.users import (
+    get_current_user_profile,
+    get_user_or_404,
+    get_user_profile,
+    get_user_stats,
+    list_users,
+    update_current_user,
+)
 from app.services.subscriptions import upsert_item as subscribe_user
-from app.services.users import get_current_user_profile, get_user_or_404, get_user_stats, list_users, update_current_user
 
 router = APIRouter(prefix="/users")
 
+USER_RECIPES_JSON = TypeAdapter(UserRecipesRow)
+
 
 @router.get("", response_model=List[User])
 async def get_users(
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
-    connection=Depends(get_connection),
+    search: str | None = None,
+    connection=Depends(get_read_connection),
 ):
-    return await list_users(connection, q=q, limit=limit, offset=offset)
+    return await list_users(connection, q=q, limit=limit, offset=offset, search=search)
 
 
 @router.get("/me", response_model=User)
-async def get_me(current_user=Depends(get_current_user)):
-    return await get_current_user_profile(current_user)
+async def get_me(
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    current_user=Depends(get_current_user),
+):
+    user, etag = await get_current_user_profile(current_user, if_none_match=if_none_match)
+    response.headers["ETag"] = etag
+    return user
 
 
 @router.patch("/me", response_model=User)
@@ -40,8 +58,15 @@ async def update_me(
 
 
 @router.get("/{user_id}", response_model=User)
-async def get_user(user_id: int, connection=Depends(get_connection)):
-    return await get_user_or_404(connection, user_id)
+async def get_user(
+    user_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    connection=Depends(get_read_connection),
+):
+    user, etag = await get_user_profile(connection, user_id, if_none_match=if_none_match)
+    response.headers["ETag"] = etag
+    return user
 
 
 @router.get("/{user_id}/recipes", response_model=UserRecipesResponse)
@@ -50,11 +75,22 @@ async def get_user_recipes(
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
-    connection=Depends(get_connection),
+    cursor: str | None = None,
+    connection=Depends(get_read_connection),
 ):
     user = await get_user_or_404(connection, user_id)
-    recipes = await list_user_recipes(connection, user_id, q=q, limit=limit, offset=offset)
-    return UserRecipesResponse(user=user, recipes=recipes)
+    recipes, next_cursor = await list_user_recipes(connection, user_id, q=q, limit=limit, offset=offset, cursor=cursor)
+    return json_response(USER_RECIPES_JSON, {"user": user, "recipes": recipes, "next_cursor": next_cursor})
+
+
+@router.get("/{user_id}/recipes/export")
+async def export_user_recipes_endpoint(
+    user_id: int,
+    connection=Depends(get_read_connection),
+):
+    await get_user_or_404(connection, user_id)
+    await connection.release()
+    return StreamingResponse(export_user_recipes(user_id), media_type="application/x-ndjson")
 
 
 @router.post("/{user_id}/subscribe", response_model=Subscription, status_code=201)
@@ -69,6 +105,6 @@ async def subscribe_user_endpoint(
 @router.get("/{user_id}/statistics", response_model=UserStatsResponse)
 async def get_user_statistics(
     user_id: int,
-    connection=Depends(get_connection),
+    connection=Depends(get_read_connection),
 ):
     return await get_user_stats(connection, user_id)
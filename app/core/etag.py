@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from fastapi import HTTPException, status
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Weak validator built from row/catalog versions: equal tags mean the same
+    resource state, not byte-identical bodies (view counts are left out).
+    """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def check_not_modified(if_none_match: str | None, etag: str) -> None:
+    """Answer 304 (via the regular HTTPException handler) if the client's copy is current."""
+    if etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
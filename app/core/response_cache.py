@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.etag import etag_matches
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+
+
+class CachedResponse(NamedTuple):
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+class ResponseCacheBackend(ABC):
+    """Storage behind the response cache. Keys look like ``<group>:<path>?<query>``."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, response: CachedResponse) -> None:
+        ...
+
+    @abstractmethod
+    async def delete_prefix(self, prefix: str) -> None:
+        ...
+
+
+class MemoryBackend(ResponseCacheBackend):
+    """Per-process LRU with a TTL; other workers only see their own entries and invalidations."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float]) -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, response: CachedResponse) -> None:
+        self._cache.set(key, response)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in self._cache.keys():
+            if key.startswith(prefix):
+                self._cache.pop(key)
+
+
+class ResponseCache:
+    """
+    Front for a backend that groups entries so write paths can drop them
+    (e.g. ``invalidate("recipes")``). A response rendered while its group
+    was being invalidated is not stored, so it cannot outlive the write.
+    """
+
+    def __init__(self, backend: ResponseCacheBackend) -> None:
+        self.backend = backend
+        self._generations: dict[str, int] = {}
+
+    def generation(self, group: str) -> int:
+        return self._generations.get(group, 0)
+
+    async def invalidate(self, group: str) -> None:
+        self._generations[group] = self.generation(group) + 1
+        await self.backend.delete_prefix(f"{group}:")
+
+
+def invalidate_on_commit(connection, *groups: str) -> None:
+    """Drop the cached responses of ``groups`` once the request's transaction commits."""
+    for group in groups:
+        connection.on_commit(lambda group=group: response_cache.invalidate(group))
+
+
+def _cache_key(group: str, path: str, query_string: bytes) -> str:
+    query = sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+    return f"{group}:{path}?{urlencode(query)}"
+
+
+class ResponseCacheMiddleware:
+    """
+    Serve anonymous GETs for opted-in routes from the cache. ``routes`` maps a
+    full-match path regex to the group that invalidates it. Only complete 200
+    responses are stored; a cached ETag still answers If-None-Match with 304.
+    """
+
+    def __init__(self, app: ASGIApp, cache: ResponseCache, routes: dict[str, str]) -> None:
+        self.app = app
+        self.cache = cache
+        self.routes = [(re.compile(pattern), group) for pattern, group in routes.items()]
+
+    def _group_for(self, path: str) -> Optional[str]:
+        for pattern, group in self.routes:
+            if pattern.fullmatch(path):
+                return group
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        group = self._group_for(scope["path"])
+        headers = Headers(scope=scope)
+        if group is None or "authorization" in headers:
+            await self.app(scope, receive, send)
+            return
+
+        key = _cache_key(group, scope["path"], scope["query_string"])
+        cached = await self.cache.backend.get(key)
+        if cached is not None:
+            await self._replay(cached, headers.get("if-none-match"), send)
+            return
+
+        generation = self.cache.generation(group)
+        start: dict = {}
+        body: list[bytes] = []
+
+        async def send_and_capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+                message["headers"] = [*message.get("headers", []), (b"x-cache", b"MISS")]
+            elif message["type"] == "http.response.body" and start.get("status") == 200:
+                body.append(message.get("body", b""))
+                if not message.get("more_body") and self.cache.generation(group) == generation:
+                    await self.cache.backend.set(
+                        key, CachedResponse(200, list(start.get("headers", [])), b"".join(body))
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
+
+    async def _replay(self, cached: CachedResponse, if_none_match: Optional[str], send: Send) -> None:
+        etag = next((value.decode("latin-1") for name, value in cached.headers if name == b"etag"), None)
+        if etag and etag_matches(if_none_match, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", etag.encode("latin-1"))]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send(
+            {"type": "http.response.start", "status": cached.status, "headers": [*cached.headers, (b"x-cache", b"HIT")]}
+        )
+        await send({"type": "http.response.body", "body": cached.body})
+
+
+response_cache = ResponseCache(MemoryBackend(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL))
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import Any, Mapping, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+def json_response(
+    adapter: TypeAdapter,
+    content: Any,
+    *,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Serialize ``content`` straight to JSON bytes with pydantic-core, skipping
+    response_model validation. Only for data the services built themselves:
+    ``adapter`` should wrap the *Row TypedDicts, which drop unknown keys the
+    same way the response models do but never instantiate models.
+    """
+    return Response(
+        adapter.dump_json(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
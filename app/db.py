@@ -1,9 +1,17 @@
+import asyncio
 import os
-from typing import AsyncIterator, Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
 import asyncpg
 from fastapi import HTTPException, status
 from asyncpg.pool import Pool
+from asyncpg.transaction import Transaction
+
+from app.loaders import bind_loaders, release_loaders
+from app.repositories import author_stats as author_stats_repo
+from app.repositories import recipe_stats as recipe_stats_repo
+from app.repositories.recipes import FTS_CONFIG
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://foodgram:foodgram@db:5432/foodgram")
 
@@ -25,22 +33,116 @@ async def close_db_connection() -> None:
         pool = None
 
 
-async def get_connection() -> AsyncIterator[asyncpg.Connection]:
-    """Provide a single connection with an open transaction."""
+class LazyConnection:
+    """
+    Connection handle that checks a pool connection out on the first query
+    and gives it back on release(), so a request holds it only while it talks
+    to the database. Write handles wrap that span in a transaction; read-only
+    handles run each statement on its own.
+    """
+
+    def __init__(self, pool: Pool, *, readonly: bool = False) -> None:
+        self._pool = pool
+        self._readonly = readonly
+        self._connection: Optional[asyncpg.Connection] = None
+        self._transaction: Optional[Transaction] = None
+        self._lock = asyncio.Lock()
+        self._on_commit: list[Callable[[], Awaitable[None]]] = []
+
+    async def acquire(self) -> asyncpg.Connection:
+        async with self._lock:
+            if self._connection is None:
+                connection = await self._pool.acquire()
+                if not self._readonly:
+                    transaction = connection.transaction()
+                    try:
+                        await transaction.start()
+                    except BaseException:
+                        await self._pool.release(connection)
+                        raise
+                    self._transaction = transaction
+                self._connection = connection
+            return self._connection
+
+    async def release(self, commit: bool = True) -> None:
+        """Finish the current transaction (if any) and return the connection to the pool."""
+        if self._connection is not None:
+            connection, transaction = self._connection, self._transaction
+            self._connection = self._transaction = None
+            try:
+                if transaction is not None:
+                    if commit:
+                        await transaction.commit()
+                    else:
+                        await transaction.rollback()
+            finally:
+                await self._pool.release(connection)
+        callbacks, self._on_commit = self._on_commit, []
+        if commit:
+            for callback in callbacks:
+                await callback()
+
+    def on_commit(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Run ``callback`` once the work done so far is committed; dropped on rollback."""
+        self._on_commit.append(callback)
+
+    async def fetch(self, query: str, *args, **kwargs):
+        return await (await self.acquire()).fetch(query, *args, **kwargs)
+
+    async def fetchrow(self, query: str, *args, **kwargs):
+        return await (await self.acquire()).fetchrow(query, *args, **kwargs)
+
+    async def fetchval(self, query: str, *args, **kwargs):
+        return await (await self.acquire()).fetchval(query, *args, **kwargs)
+
+    async def execute(self, query: str, *args, **kwargs):
+        return await (await self.acquire()).execute(query, *args, **kwargs)
+
+    async def executemany(self, command: str, args, **kwargs):
+        return await (await self.acquire()).executemany(command, args, **kwargs)
+
+
+def _require_pool() -> Pool:
     if pool is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Database pool is not initialized",
         )
+    return pool
+
+
+@asynccontextmanager
+async def _lazy_connection(readonly: bool) -> AsyncIterator[LazyConnection]:
+    connection = LazyConnection(_require_pool(), readonly=readonly)
+    bind_loaders(connection)
+    try:
+        yield connection
+    except BaseException:
+        await connection.release(commit=False)
+        raise
+    else:
+        await connection.release()
+    finally:
+        release_loaders(connection)
+
+
+async def get_connection() -> AsyncIterator[LazyConnection]:
+    """Provide a lazily acquired connection whose queries share one transaction."""
+    async with _lazy_connection(readonly=False) as connection:
+        yield connection
 
-    async with pool.acquire() as connection:
-        async with connection.transaction():
-            yield connection
+
+async def get_read_connection() -> AsyncIterator[LazyConnection]:
+    """Provide a lazily acquired connection for read-only handlers, without an explicit transaction."""
+    async with _lazy_connection(readonly=True) as connection:
+        yield connection
 
 
 async def init_db() -> None:
     """Create tables if they are missing (lightweight bootstrap, not a migration system)."""
-    schema_sql = """
+    schema_sql = f"""
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
     CREATE TABLE IF NOT EXISTS users (
         id SERIAL PRIMARY KEY,
         username VARCHAR(150) UNIQUE NOT NULL,
@@ -133,7 +235,258 @@ async def init_db() -> None:
         CONSTRAINT subscriptions_check CHECK (user_id <> following_id)
     );
     ALTER TABLE recipes ADD COLUMN IF NOT EXISTS views INTEGER NOT NULL DEFAULT 0;
+
+    -- Weighted full-text document for recipe search (name ranks above text).
+    ALTER TABLE recipes ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('{FTS_CONFIG}', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('{FTS_CONFIG}', coalesce(text, '')), 'B')
+        ) STORED;
+    CREATE INDEX IF NOT EXISTS recipes_search_vector_idx ON recipes USING GIN (search_vector);
+
+    -- Time-decayed score behind sort=popular, refreshed in batches by app.services.popularity.
+    ALTER TABLE recipes ADD COLUMN IF NOT EXISTS popularity_score DOUBLE PRECISION NOT NULL DEFAULT 0;
+    CREATE INDEX IF NOT EXISTS recipes_popularity_id_idx ON recipes (popularity_score DESC, id DESC);
+
+    -- Row and catalog versions behind the weak ETags (app.core.etag).
+    ALTER TABLE recipes ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+    ALTER TABLE users ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+    CREATE TABLE IF NOT EXISTS catalog_versions (
+        name TEXT PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 1
+    );
+    INSERT INTO catalog_versions (name) VALUES ('tags'), ('ingredients') ON CONFLICT (name) DO NOTHING;
+
+    -- Trigram indexes for substring (LIKE '%q%') and fuzzy (%, similarity) lookups.
+    CREATE INDEX IF NOT EXISTS ingredients_name_trgm_idx ON ingredients USING GIN (LOWER(name) gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS tags_name_trgm_idx ON tags USING GIN (LOWER(name) gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS users_first_name_trgm_idx ON users USING GIN (LOWER(first_name) gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS users_last_name_trgm_idx ON users USING GIN (LOWER(last_name) gin_trgm_ops);
+    CREATE INDEX IF NOT EXISTS recipe_ingredients_ingredient_id_idx ON recipe_ingredients (ingredient_id);
+
+    -- Composite indexes matching the keyset (cursor) pagination sort orders.
+    CREATE INDEX IF NOT EXISTS recipes_pub_date_id_idx ON recipes (pub_date DESC, id DESC);
+    DROP INDEX IF EXISTS recipes_views_pub_date_id_idx;
+    CREATE INDEX IF NOT EXISTS recipes_author_pub_date_id_idx ON recipes (author_id, pub_date DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS comments_recipe_created_id_idx ON comments (recipe_id, created_at DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS ratings_recipe_created_id_idx ON ratings (recipe_id, created_at DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS favorites_user_id_id_idx ON favorites (user_id, id);
+    CREATE INDEX IF NOT EXISTS shopping_list_user_id_id_idx ON shopping_list (user_id, id);
+    CREATE INDEX IF NOT EXISTS subscriptions_user_added_id_idx ON subscriptions (user_id, added_at DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS subscriptions_following_added_id_idx ON subscriptions (following_id, added_at DESC, id DESC);
+
+    -- Per-recipe counters kept in sync by triggers, so statistics are a primary-key read.
+    CREATE TABLE IF NOT EXISTS recipe_stats (
+        recipe_id INTEGER PRIMARY KEY REFERENCES recipes(id) ON DELETE CASCADE,
+        likes_count INTEGER NOT NULL DEFAULT 0,
+        comments_count INTEGER NOT NULL DEFAULT 0,
+        rating_sum INTEGER NOT NULL DEFAULT 0,
+        rating_count INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE OR REPLACE FUNCTION recipe_stats_on_favorite() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO recipe_stats (recipe_id, likes_count) VALUES (NEW.recipe_id, 1)
+            ON CONFLICT (recipe_id) DO UPDATE SET likes_count = recipe_stats.likes_count + 1;
+        ELSE
+            UPDATE recipe_stats SET likes_count = likes_count - 1 WHERE recipe_id = OLD.recipe_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION recipe_stats_on_comment() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO recipe_stats (recipe_id, comments_count) VALUES (NEW.recipe_id, 1)
+            ON CONFLICT (recipe_id) DO UPDATE SET comments_count = recipe_stats.comments_count + 1;
+        ELSE
+            UPDATE recipe_stats SET comments_count = comments_count - 1 WHERE recipe_id = OLD.recipe_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION recipe_stats_on_rating() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO recipe_stats (recipe_id, rating_sum, rating_count) VALUES (NEW.recipe_id, NEW.rate, 1)
+            ON CONFLICT (recipe_id) DO UPDATE SET
+                rating_sum = recipe_stats.rating_sum + NEW.rate,
+                rating_count = recipe_stats.rating_count + 1;
+        ELSIF TG_OP = 'UPDATE' THEN
+            UPDATE recipe_stats SET rating_sum = rating_sum - OLD.rate + NEW.rate WHERE recipe_id = NEW.recipe_id;
+        ELSE
+            UPDATE recipe_stats SET rating_sum = rating_sum - OLD.rate, rating_count = rating_count - 1
+            WHERE recipe_id = OLD.recipe_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER favorites_recipe_stats AFTER INSERT OR DELETE ON favorites
+        FOR EACH ROW EXECUTE FUNCTION recipe_stats_on_favorite();
+    CREATE OR REPLACE TRIGGER comments_recipe_stats AFTER INSERT OR DELETE ON comments
+        FOR EACH ROW EXECUTE FUNCTION recipe_stats_on_comment();
+    CREATE OR REPLACE TRIGGER ratings_recipe_stats AFTER INSERT OR DELETE OR UPDATE OF rate ON ratings
+        FOR EACH ROW EXECUTE FUNCTION recipe_stats_on_rating();
+
+    -- Per-author counters for profile statistics, also trigger-maintained.
+    CREATE TABLE IF NOT EXISTS author_stats (
+        user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+        likes_received INTEGER NOT NULL DEFAULT 0,
+        subscribers_count INTEGER NOT NULL DEFAULT 0,
+        comments_received INTEGER NOT NULL DEFAULT 0,
+        recipes_count INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE OR REPLACE FUNCTION author_stats_on_favorite() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO author_stats (user_id, likes_received)
+            SELECT author_id, 1 FROM recipes WHERE id = NEW.recipe_id
+            ON CONFLICT (user_id) DO UPDATE SET likes_received = author_stats.likes_received + 1;
+        ELSE
+            -- No match when the recipe itself is being deleted; recipes_author_stats settles that.
+            UPDATE author_stats a SET likes_received = a.likes_received - 1
+            FROM recipes r WHERE r.id = OLD.recipe_id AND a.user_id = r.author_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION author_stats_on_comment() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO author_stats (user_id, comments_received)
+            SELECT author_id, 1 FROM recipes WHERE id = NEW.recipe_id
+            ON CONFLICT (user_id) DO UPDATE SET comments_received = author_stats.comments_received + 1;
+        ELSE
+            UPDATE author_stats a SET comments_received = a.comments_received - 1
+            FROM recipes r WHERE r.id = OLD.recipe_id AND a.user_id = r.author_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION author_stats_on_subscription() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO author_stats (user_id, subscribers_count) VALUES (NEW.following_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET subscribers_count = author_stats.subscribers_count + 1;
+        ELSE
+            UPDATE author_stats SET subscribers_count = subscribers_count - 1 WHERE user_id = OLD.following_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION author_stats_on_recipe() RETURNS trigger AS $$
+    DECLARE
+        stats recipe_stats%ROWTYPE;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO author_stats (user_id, recipes_count) VALUES (NEW.author_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET recipes_count = author_stats.recipes_count + 1;
+            RETURN NULL;
+        END IF;
+        -- BEFORE DELETE: the recipe's counters are still there to subtract.
+        SELECT * INTO stats FROM recipe_stats WHERE recipe_id = OLD.id;
+        UPDATE author_stats SET
+            recipes_count = recipes_count - 1,
+            likes_received = likes_received - COALESCE(stats.likes_count, 0),
+            comments_received = comments_received - COALESCE(stats.comments_count, 0)
+        WHERE user_id = OLD.author_id;
+        RETURN OLD;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER favorites_author_stats AFTER INSERT OR DELETE ON favorites
+        FOR EACH ROW EXECUTE FUNCTION author_stats_on_favorite();
+    CREATE OR REPLACE TRIGGER comments_author_stats AFTER INSERT OR DELETE ON comments
+        FOR EACH ROW EXECUTE FUNCTION author_stats_on_comment();
+    CREATE OR REPLACE TRIGGER subscriptions_author_stats AFTER INSERT OR DELETE ON subscriptions
+        FOR EACH ROW EXECUTE FUNCTION author_stats_on_subscription();
+    CREATE OR REPLACE TRIGGER recipes_author_stats_insert AFTER INSERT ON recipes
+        FOR EACH ROW EXECUTE FUNCTION author_stats_on_recipe();
+    CREATE OR REPLACE TRIGGER recipes_author_stats_delete BEFORE DELETE ON recipes
+        FOR EACH ROW EXECUTE FUNCTION author_stats_on_recipe();
+
+    -- Versions change only with what the API returns: views, popularity and passwords don't count.
+    CREATE OR REPLACE FUNCTION bump_row_version() RETURNS trigger AS $$
+    BEGIN
+        NEW.version := OLD.version + 1;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER recipes_version BEFORE UPDATE OF name, image, text, cooking_time ON recipes
+        FOR EACH ROW
+        WHEN ((OLD.name, OLD.image, OLD.text, OLD.cooking_time)
+              IS DISTINCT FROM (NEW.name, NEW.image, NEW.text, NEW.cooking_time))
+        EXECUTE FUNCTION bump_row_version();
+    CREATE OR REPLACE TRIGGER users_version BEFORE UPDATE OF email, first_name, last_name, avatar ON users
+        FOR EACH ROW
+        WHEN ((OLD.email, OLD.first_name, OLD.last_name, OLD.avatar)
+              IS DISTINCT FROM (NEW.email, NEW.first_name, NEW.last_name, NEW.avatar))
+        EXECUTE FUNCTION bump_row_version();
+
+    -- Tags and ingredients are part of the recipe body; bump once per statement, not per link row.
+    CREATE OR REPLACE FUNCTION bump_recipe_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE recipes SET version = version + 1 WHERE id IN (SELECT recipe_id FROM changed);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER recipe_tag_version_insert AFTER INSERT ON recipe_tag
+        REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_recipe_version();
+    CREATE OR REPLACE TRIGGER recipe_tag_version_update AFTER UPDATE ON recipe_tag
+        REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_recipe_version();
+    CREATE OR REPLACE TRIGGER recipe_tag_version_delete AFTER DELETE ON recipe_tag
+        REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_recipe_version();
+    CREATE OR REPLACE TRIGGER recipe_ingredients_version_insert AFTER INSERT ON recipe_ingredients
+        REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_recipe_version();
+    CREATE OR REPLACE TRIGGER recipe_ingredients_version_update AFTER UPDATE ON recipe_ingredients
+        REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_recipe_version();
+    CREATE OR REPLACE TRIGGER recipe_ingredients_version_delete AFTER DELETE ON recipe_ingredients
+        REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_recipe_version();
+
+    -- Catalog versions are committed data, so a reader never sees a version ahead of the rows it
+    -- describes. Statement-level with transition tables: statements that change nothing (e.g. ON CONFLICT
+    -- DO NOTHING) leave the counter row unlocked; real catalog writes queue on it until they commit.
+    CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM changed) THEN
+            UPDATE catalog_versions SET version = version + 1 WHERE name = TG_ARGV[0];
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER tags_version_insert AFTER INSERT ON tags
+        REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('tags');
+    CREATE OR REPLACE TRIGGER tags_version_update AFTER UPDATE ON tags
+        REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('tags');
+    CREATE OR REPLACE TRIGGER tags_version_delete AFTER DELETE ON tags
+        REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('tags');
+    CREATE OR REPLACE TRIGGER ingredients_version_insert AFTER INSERT ON ingredients
+        REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('ingredients');
+    CREATE OR REPLACE TRIGGER ingredients_version_update AFTER UPDATE ON ingredients
+        REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('ingredients');
+    CREATE OR REPLACE TRIGGER ingredients_version_delete AFTER DELETE ON ingredients
+        REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version('ingredients');
     """
 
     async with pool.acquire() as connection:  # type: ignore[arg-type]
+        recipe_stats_exist = await connection.fetchval("SELECT to_regclass('recipe_stats') IS NOT NULL")
+        author_stats_exist = await connection.fetchval("SELECT to_regclass('author_stats') IS NOT NULL")
         await connection.execute(schema_sql)
+        # First start with counters: fill them from the existing rows once.
+        if not recipe_stats_exist:
+            async with connection.transaction():
+                await recipe_stats_repo.rebuild(connection)
+        if not author_stats_exist:
+            async with connection.transaction():
+                await author_stats_repo.rebuild(connection)
@@ -6,15 +6,16 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.core.security import decode_token
-from app.db import get_connection
-from app.repositories import users as users_repo
+from app.db import get_read_connection
+from app.loaders import get_loaders
+from app.services.users import auth_user_cache
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
-    connection=Depends(get_connection),
+    connection=Depends(get_read_connection),
 ):
     if credentials is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
@@ -32,9 +33,19 @@ async def get_current_user(
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token missing subject")
 
-    user = await users_repo.get_by_id(connection, int(user_id))
+    user_id = int(user_id)
+    cached = auth_user_cache.get(user_id)
+    if cached is not None:
+        # No query, so the lazy connection is never checked out for authentication.
+        return dict(cached)
+
+    generation = auth_user_cache.generation()
+    user = await get_loaders(connection).users.load(user_id)
+    # Hand the connection back before the handler runs; it re-acquires on its next query.
+    await connection.release()
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
     user.pop("password_hash", None)
+    auth_user_cache.set(user_id, dict(user), generation)
     return user
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+from app.repositories import recipes as recipes_repo
+from app.repositories import users as users_repo
+
+BatchFn = Callable[[List[Any]], Awaitable[List[Dict[str, Any]]]]
+
+
+class DataLoader:
+    """
+    Collect keys requested in the same event-loop tick, resolve them with one
+    batch query and memoize the rows for the rest of the request.
+    """
+
+    def __init__(self, batch_fn: BatchFn, key: str = "id") -> None:
+        self._batch_fn = batch_fn
+        self._key = key
+        self._cache: dict[Hashable, asyncio.Future] = {}
+        self._queue: list[tuple[Hashable, asyncio.Future]] = []
+        self._dispatch_task: Optional[asyncio.Task] = None
+
+    async def load(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        row = await self._future_for(key)
+        # Callers are free to mutate what they get back (e.g. _sanitize).
+        return dict(row) if row is not None else None
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Optional[Dict[str, Any]]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, row: Dict[str, Any]) -> None:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(dict(row))
+        self._cache[key] = future
+
+    def clear(self, key: Hashable) -> None:
+        self._cache.pop(key, None)
+
+    def _future_for(self, key: Hashable) -> asyncio.Future:
+        future = self._cache.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+        self._queue.append((key, future))
+        if len(self._queue) == 1:
+            # The task first runs after every load already scheduled in this tick.
+            self._dispatch_task = loop.create_task(self._dispatch())
+        return future
+
+    async def _dispatch(self) -> None:
+        pending, self._queue = self._queue, []
+        try:
+            rows = await self._batch_fn([key for key, _ in pending])
+        except Exception as exc:
+            for key, future in pending:
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+                future.set_exception(exc)
+            return
+        by_key = {row[self._key]: row for row in rows}
+        for key, future in pending:
+            future.set_result(by_key.get(key))
+
+
+class Loaders:
+    """Per-request set of loaders bound to one connection."""
+
+    def __init__(self, connection) -> None:
+        self.users = DataLoader(lambda ids: users_repo.get_by_ids(connection, ids))
+        self.recipes = DataLoader(lambda ids: recipes_repo.get_by_ids(connection, ids))
+
+
+_loaders: dict[int, Loaders] = {}
+
+
+def bind_loaders(connection) -> Loaders:
+    loaders = Loaders(connection)
+    _loaders[id(connection)] = loaders
+    return loaders
+
+
+def release_loaders(connection) -> None:
+    _loaders.pop(id(connection), None)
+
+
+def get_loaders(connection) -> Loaders:
+    """
+    Return the loaders bound to ``connection`` by ``get_connection``.
+    Connections acquired outside a request get a fresh, unshared set.
+    """
+    return _loaders.get(id(connection)) or Loaders(connection)
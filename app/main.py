@@ -1,21 +1,46 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
+from app import db
 from app.api import router as api_router
+from app.core.response_cache import ResponseCacheMiddleware, response_cache
+from app.core.security import password_hasher
 from app.db import close_db_connection, connect_to_db, init_db
+from app.services.catalog import warm_catalogs
+from app.services.images import derivative_worker
+from app.services.popularity import popularity_refresher
+from app.services.views import view_counter
 
 app = FastAPI(title="Foodgram API (FastAPI + PostgreSQL, raw SQL)")
 
+# Anonymous list endpoints served from the response cache; groups are invalidated by the write services.
+CACHED_ROUTES = {
+    r"/api/v1/recipes": "recipes",
+    r"/api/v1/users/\d+/recipes": "recipes",
+    r"/api/v1/tags": "tags",
+    r"/api/v1/ingredients": "ingredients",
+}
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache, routes=CACHED_ROUTES)
+
 
 @app.on_event("startup")
 async def on_startup() -> None:
     await connect_to_db()
     await init_db()
+    async with db.pool.acquire() as connection:
+        await warm_catalogs(connection)
+    view_counter.start()
+    popularity_refresher.start()
+    derivative_worker.start()
 
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
+    await derivative_worker.stop()
+    await popularity_refresher.stop()
+    await view_counter.stop()
     await close_db_connection()
+    password_hasher.shutdown()
 
 
 app.include_router(api_router)
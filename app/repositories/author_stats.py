@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import asyncpg
+
+
+async def get_for_user(conn: asyncpg.Connection, user_id: int) -> Optional[Dict[str, Any]]:
+    record = await conn.fetchrow(
+        """
+        SELECT u.id AS user_id,
+               COALESCE(a.likes_received, 0) AS likes_received,
+               COALESCE(a.subscribers_count, 0) AS subscribers_count,
+               COALESCE(a.comments_received, 0) AS comments_received,
+               COALESCE(a.recipes_count, 0) AS recipes_count
+        FROM users u
+        LEFT JOIN author_stats a ON a.user_id = u.id
+        WHERE u.id = $1
+        """,
+        user_id,
+    )
+    return dict(record) if record else None
+
+
+async def rebuild(conn: asyncpg.Connection) -> int:
+    """
+    Recount every author's counters from the source tables. Must run inside a
+    transaction: the source tables are locked against writes until it commits.
+    """
+    await conn.execute("LOCK TABLE recipes, favorites, comments, subscriptions IN SHARE MODE")
+    result = await conn.execute(
+        """
+        INSERT INTO author_stats (user_id, likes_received, subscribers_count, comments_received, recipes_count)
+        SELECT u.id,
+               COALESCE(f.count, 0),
+               COALESCE(s.count, 0),
+               COALESCE(c.count, 0),
+               COALESCE(r.count, 0)
+        FROM users u
+        LEFT JOIN (
+            SELECT r.author_id, COUNT(*) AS count
+            FROM favorites f JOIN recipes r ON r.id = f.recipe_id
+            GROUP BY r.author_id
+        ) f ON f.author_id = u.id
+        LEFT JOIN (
+            SELECT following_id, COUNT(*) AS count FROM subscriptions GROUP BY following_id
+        ) s ON s.following_id = u.id
+        LEFT JOIN (
+            SELECT r.author_id, COUNT(*) AS count
+            FROM comments c JOIN recipes r ON r.id = c.recipe_id
+            GROUP BY r.author_id
+        ) c ON c.author_id = u.id
+        LEFT JOIN (
+            SELECT author_id, COUNT(*) AS count FROM recipes GROUP BY author_id
+        ) r ON r.author_id = u.id
+        ON CONFLICT (user_id) DO UPDATE SET
+            likes_received = EXCLUDED.likes_received,
+            subscribers_count = EXCLUDED.subscribers_count,
+            comments_received = EXCLUDED.comments_received,
+            recipes_count = EXCLUDED.recipes_count
+        """
+    )
+    return int(result.split()[-1])
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+import asyncpg
+
+# Session-local staging tables; every batch commits, which empties them again.
+STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS bulk_users (
+    email TEXT NOT NULL,
+    username TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    password_hash TEXT NOT NULL
+) ON COMMIT DELETE ROWS;
+
+CREATE TEMP TABLE IF NOT EXISTS bulk_recipes (
+    id INTEGER NOT NULL,
+    author_email TEXT NOT NULL,
+    name TEXT NOT NULL,
+    image TEXT NOT NULL,
+    text TEXT NOT NULL,
+    cooking_time SMALLINT NOT NULL,
+    pub_date TIMESTAMP WITHOUT TIME ZONE
+) ON COMMIT DELETE ROWS;
+
+CREATE TEMP TABLE IF NOT EXISTS bulk_recipe_tags (
+    recipe_id INTEGER NOT NULL,
+    name TEXT NOT NULL
+) ON COMMIT DELETE ROWS;
+
+CREATE TEMP TABLE IF NOT EXISTS bulk_recipe_ingredients (
+    recipe_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    measurement_unit TEXT NOT NULL,
+    amount SMALLINT NOT NULL
+) ON COMMIT DELETE ROWS;
+"""
+
+MERGE_STEPS: List[Tuple[str, str]] = [
+    (
+        "users",
+        """
+        INSERT INTO users (username, email, first_name, last_name, password_hash)
+        SELECT DISTINCT ON (email) username, email, first_name, last_name, password_hash
+        FROM bulk_users
+        ORDER BY email
+        ON CONFLICT DO NOTHING
+        """,
+    ),
+    (
+        "tags",
+        """
+        INSERT INTO tags (name)
+        SELECT DISTINCT name FROM bulk_recipe_tags
+        ON CONFLICT (name) DO NOTHING
+        """,
+    ),
+    (
+        "ingredients",
+        """
+        INSERT INTO ingredients (name, measurement_unit)
+        SELECT DISTINCT ON (name) name, measurement_unit
+        FROM bulk_recipe_ingredients
+        ORDER BY name
+        ON CONFLICT (name) DO NOTHING
+        """,
+    ),
+    (
+        "recipes",
+        """
+        INSERT INTO recipes (id, author_id, name, image, text, cooking_time, pub_date)
+        SELECT b.id, u.id, b.name, b.image, b.text, b.cooking_time, COALESCE(b.pub_date, NOW())
+        FROM bulk_recipes b
+        JOIN users u ON u.email = b.author_email
+        """,
+    ),
+    (
+        "recipe_tag",
+        """
+        INSERT INTO recipe_tag (recipe_id, tag_id)
+        SELECT r.id, t.id
+        FROM bulk_recipe_tags bt
+        JOIN recipes r ON r.id = bt.recipe_id
+        JOIN tags t ON t.name = bt.name
+        ON CONFLICT (recipe_id, tag_id) DO NOTHING
+        """,
+    ),
+    (
+        "recipe_ingredients",
+        """
+        INSERT INTO recipe_ingredients (recipe_id, ingredient_id, amount)
+        SELECT r.id, i.id, bi.amount
+        FROM bulk_recipe_ingredients bi
+        JOIN recipes r ON r.id = bi.recipe_id
+        JOIN ingredients i ON i.name = bi.name
+        ON CONFLICT (recipe_id, ingredient_id) DO NOTHING
+        """,
+    ),
+]
+
+
+async def create_staging(conn: asyncpg.Connection) -> None:
+    await conn.execute(STAGING_SQL)
+
+
+async def allocate_recipe_ids(conn: asyncpg.Connection, count: int) -> List[int]:
+    """Reserve ``count`` ids from the recipes sequence so link rows can be staged alongside their recipe."""
+    records = await conn.fetch(
+        "SELECT nextval(pg_get_serial_sequence('recipes', 'id')) AS id FROM generate_series(1, $1)",
+        count,
+    )
+    return [r["id"] for r in records]
+
+
+async def copy_batch(
+    conn: asyncpg.Connection,
+    users: Sequence[tuple],
+    recipes: Sequence[tuple],
+    recipe_tags: Sequence[tuple],
+    recipe_ingredients: Sequence[tuple],
+) -> None:
+    """COPY one batch into the staging tables. Must run inside the batch transaction."""
+    await conn.copy_records_to_table(
+        "bulk_users",
+        records=users,
+        columns=["email", "username", "first_name", "last_name", "password_hash"],
+    )
+    await conn.copy_records_to_table(
+        "bulk_recipes",
+        records=recipes,
+        columns=["id", "author_email", "name", "image", "text", "cooking_time", "pub_date"],
+    )
+    await conn.copy_records_to_table("bulk_recipe_tags", records=recipe_tags, columns=["recipe_id", "name"])
+    await conn.copy_records_to_table(
+        "bulk_recipe_ingredients",
+        records=recipe_ingredients,
+        columns=["recipe_id", "name", "measurement_unit", "amount"],
+    )
+
+
+async def merge_batch(conn: asyncpg.Connection) -> Dict[str, int]:
+    """Move the staged batch into the real tables; returns inserted rows per table."""
+    inserted: Dict[str, int] = {}
+    for table, query in MERGE_STEPS:
+        result = await conn.execute(query)
+        inserted[table] = int(result.split()[-1])
+    return inserted
@@ -4,6 +4,10 @@ from typing import Any, Dict, List, Optional
 
 import asyncpg
 
+from app.repositories.utils import keyset_condition
+
+CURSOR_KEYS = ("created_at", "id")
+
 
 async def list_comments(
     conn: asyncpg.Connection,
@@ -11,6 +15,7 @@ async def list_comments(
     q: str | None = None,
     limit: int = 50,
     offset: int = 0,
+    after: Optional[List[Any]] = None,
 ) -> List[Dict[str, Any]]:
     params: list[Any] = []
     conditions = []
@@ -20,6 +25,8 @@ async def list_comments(
     if q:
         params.append(f"%{q.lower()}%")
         conditions.append(f"LOWER(text) LIKE ${len(params)}")
+    if after is not None:
+        conditions.append(keyset_condition(CURSOR_KEYS, after, params))
 
     where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     params.extend([limit, offset])
@@ -27,7 +34,7 @@ async def list_comments(
         SELECT id, user_id, recipe_id, text, image, created_at
         FROM comments
         {where_clause}
-        ORDER BY created_at DESC
+        ORDER BY created_at DESC, id DESC
         LIMIT ${len(params)-1} OFFSET ${len(params)}
     """
     records = await conn.fetch(query, *params)
@@ -92,7 +99,7 @@ async def update_comment(
     comment_id: int,
     text: Optional[str],
     image: Optional[str],
-) -> Dict[str, Any]:
+) -> Optional[Dict[str, Any]]:
     record = await conn.fetchrow(
         """
         UPDATE comments
@@ -104,4 +111,4 @@ async def update_comment(
         image,
         comment_id,
     )
-    return dict(record)
+    return dict(record) if record else None
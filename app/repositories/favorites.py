@@ -1,17 +1,30 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import asyncpg
 
+from app.repositories.utils import iter_chunks, keyset_condition
 
-async def list_favorites(conn: asyncpg.Connection, user_id: int, q: str | None, limit: int, offset: int) -> List[Dict[str, Any]]:
+CURSOR_KEYS = ("id",)
+
+
+async def list_favorites(
+    conn: asyncpg.Connection,
+    user_id: int,
+    q: str | None,
+    limit: int,
+    offset: int,
+    after: Optional[List[Any]] = None,
+) -> List[Dict[str, Any]]:
     params: list[Any] = [user_id]
     where = "f.user_id = $1"
     join = "JOIN recipes r ON r.id = f.recipe_id"
     if q:
         params.append(f"%{q.lower()}%")
         where += f" AND LOWER(r.name) LIKE ${len(params)}"
+    if after is not None:
+        where += " AND " + keyset_condition(["f.id"], after, params, descending=False)
 
     params.extend([limit, offset])
     query = f"""
@@ -26,6 +39,23 @@ async def list_favorites(conn: asyncpg.Connection, user_id: int, q: str | None,
     return [dict(r) for r in records]
 
 
+def iter_favorite_recipes(
+    conn: asyncpg.Connection, user_id: int, chunk_size: int
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    return iter_chunks(
+        conn,
+        """
+        SELECT r.views, r.id, r.author_id, r.name, r.image, r.text, r.cooking_time, r.pub_date
+        FROM favorites f
+        JOIN recipes r ON r.id = f.recipe_id
+        WHERE f.user_id = $1
+        ORDER BY f.id
+        """,
+        user_id,
+        chunk_size=chunk_size,
+    )
+
+
 async def add_favorite(conn: asyncpg.Connection, user_id: int, recipe_id: int) -> Dict[str, Any]:
     record = await conn.fetchrow(
         """
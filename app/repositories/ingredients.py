@@ -4,22 +4,44 @@ from typing import Any, Dict, Optional
 
 import asyncpg
 
+from app.repositories.utils import SEARCH_FUZZY
 
-async def list_ingredients(conn: asyncpg.Connection, q: str | None, limit: int, offset: int, sort: str | None = None) -> list[Dict[str, Any]]:
-    order = "usage_count DESC, name" if sort == "popular" else "name"
-    base_query = f"""
-        SELECT i.id, i.name, i.measurement_unit,
-               COALESCE(ri_count.count, 0) AS usage_count
-        FROM ingredients i
-        LEFT JOIN (
-            SELECT ingredient_id, COUNT(*) AS count
-            FROM recipe_ingredients
-            GROUP BY ingredient_id
-        ) ri_count ON ri_count.ingredient_id = i.id
-    """
+
+async def list_ingredients(
+    conn: asyncpg.Connection,
+    q: str | None,
+    limit: int,
+    offset: int,
+    sort: str | None = None,
+    search: str | None = None,
+) -> list[Dict[str, Any]]:
+    fuzzy = bool(q) and search == SEARCH_FUZZY
+    if sort == "popular":
+        order = "usage_count DESC, name"
+        base_query = """
+            SELECT i.id, i.name, i.measurement_unit,
+                   COALESCE(ri_count.count, 0) AS usage_count
+            FROM ingredients i
+            LEFT JOIN (
+                SELECT ingredient_id, COUNT(*) AS count
+                FROM recipe_ingredients
+                GROUP BY ingredient_id
+            ) ri_count ON ri_count.ingredient_id = i.id
+        """
+    else:
+        # Counted per returned row only, so autocomplete never aggregates the whole table.
+        order = "similarity(LOWER(i.name), $1) DESC, name" if fuzzy else "name"
+        base_query = """
+            SELECT i.id, i.name, i.measurement_unit,
+                   (SELECT COUNT(*) FROM recipe_ingredients ri WHERE ri.ingredient_id = i.id) AS usage_count
+            FROM ingredients i
+        """
     where_clause = ""
     params: list[Any] = []
-    if q:
+    if fuzzy:
+        where_clause = "WHERE LOWER(i.name) % $1"
+        params.append(q.lower())
+    elif q:
         where_clause = "WHERE LOWER(i.name) LIKE $1"
         params.append(f"%{q.lower()}%")
 
@@ -34,11 +56,29 @@ async def list_ingredients(conn: asyncpg.Connection, q: str | None, limit: int,
     return [dict(r) for r in records]
 
 
+async def list_all(conn: asyncpg.Connection, limit: int) -> list[Dict[str, Any]]:
+    records = await conn.fetch("SELECT id, name, measurement_unit FROM ingredients ORDER BY id LIMIT $1", limit)
+    return [dict(r) for r in records]
+
+
 async def get_by_id(conn: asyncpg.Connection, ingredient_id: int) -> Optional[Dict[str, Any]]:
     record = await conn.fetchrow("SELECT id, name, measurement_unit FROM ingredients WHERE id = $1", ingredient_id)
     return dict(record) if record else None
 
 
+async def get_by_ids(conn: asyncpg.Connection, ingredient_ids: list[int]) -> list[Dict[str, Any]]:
+    records = await conn.fetch(
+        "SELECT id, name, measurement_unit FROM ingredients WHERE id = ANY($1::int[])",
+        ingredient_ids,
+    )
+    return [dict(r) for r in records]
+
+
 async def get_by_name(conn: asyncpg.Connection, name: str) -> Optional[Dict[str, Any]]:
     record = await conn.fetchrow("SELECT id, name, measurement_unit FROM ingredients WHERE name = $1", name)
     return dict(record) if record else None
+
+
+async def get_version(conn: asyncpg.Connection) -> int:
+    """Committed catalog version, bumped by a trigger on every write to the table."""
+    return await conn.fetchval("SELECT version FROM catalog_versions WHERE name = 'ingredients'")
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from typing import Set
+
+import asyncpg
+
+
+async def list_referenced(conn: asyncpg.Connection) -> Set[str]:
+    """Every local media URL still stored on a user, recipe or comment."""
+    records = await conn.fetch(
+        """
+        SELECT avatar AS url FROM users WHERE avatar LIKE '/media/%'
+        UNION
+        SELECT image FROM recipes WHERE image LIKE '/media/%'
+        UNION
+        SELECT image FROM comments WHERE image LIKE '/media/%'
+        """
+    )
+    return {r["url"] for r in records}
@@ -4,24 +4,32 @@ from typing import Any, Dict, List, Optional
 
 import asyncpg
 
+from app.repositories.utils import keyset_condition
+
+CURSOR_KEYS = ("created_at", "id")
+
 
 async def list_ratings(
     conn: asyncpg.Connection,
     recipe_id: Optional[int] = None,
     limit: int = 50,
     offset: int = 0,
+    after: Optional[List[Any]] = None,
 ) -> List[Dict[str, Any]]:
     params: list[Any] = []
-    where = ""
+    conditions = []
     if recipe_id is not None:
-        where = "WHERE recipe_id = $1"
         params.append(recipe_id)
+        conditions.append("recipe_id = $1")
+    if after is not None:
+        conditions.append(keyset_condition(CURSOR_KEYS, after, params))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     params.extend([limit, offset])
     query = f"""
         SELECT id, user_id, recipe_id, rate, created_at
         FROM ratings
         {where}
-        ORDER BY created_at DESC
+        ORDER BY created_at DESC, id DESC
         LIMIT ${len(params)-1} OFFSET ${len(params)}
     """
     records = await conn.fetch(query, *params)
@@ -29,7 +37,10 @@ async def list_ratings(
 
 
 async def get_avg_rate(conn: asyncpg.Connection, recipe_id: int) -> float:
-    record = await conn.fetchrow("SELECT AVG(rate) AS avg_rate FROM ratings WHERE recipe_id = $1", recipe_id)
+    record = await conn.fetchrow(
+        "SELECT rating_sum::float / NULLIF(rating_count, 0) AS avg_rate FROM recipe_stats WHERE recipe_id = $1",
+        recipe_id,
+    )
     if record and record["avg_rate"] is not None:
         return float(record["avg_rate"])
     return 0.0
@@ -21,6 +21,19 @@ async def list_items(conn: asyncpg.Connection, recipe_id: int | None = None) ->
     return [dict(r) for r in records]
 
 
+async def list_for_recipes(conn: asyncpg.Connection, recipe_ids: List[int]) -> List[Dict[str, Any]]:
+    records = await conn.fetch(
+        """
+        SELECT id, recipe_id, ingredient_id, amount
+        FROM recipe_ingredients
+        WHERE recipe_id = ANY($1::int[])
+        ORDER BY recipe_id, id
+        """,
+        recipe_ids,
+    )
+    return [dict(r) for r in records]
+
+
 async def upsert_item(conn: asyncpg.Connection, recipe_id: int, ingredient_id: int, amount: int) -> Dict[str, Any]:
     record = await conn.fetchrow(
         """
@@ -37,6 +50,32 @@ async def upsert_item(conn: asyncpg.Connection, recipe_id: int, ingredient_id: i
     return dict(record)
 
 
+async def sync_for_recipe(
+    conn: asyncpg.Connection,
+    recipe_id: int,
+    ingredient_ids: List[int],
+    amounts: List[int],
+) -> None:
+    """Make the recipe's rows exactly the given pairs, rewriting only rows whose amount changed."""
+    await conn.execute(
+        """
+        WITH removed AS (
+            DELETE FROM recipe_ingredients
+            WHERE recipe_id = $1 AND ingredient_id <> ALL($2::int[])
+        )
+        INSERT INTO recipe_ingredients (recipe_id, ingredient_id, amount)
+        SELECT $1, item.ingredient_id, item.amount
+        FROM unnest($2::int[], $3::smallint[]) AS item(ingredient_id, amount)
+        ON CONFLICT (recipe_id, ingredient_id)
+        DO UPDATE SET amount = EXCLUDED.amount
+        WHERE recipe_ingredients.amount IS DISTINCT FROM EXCLUDED.amount
+        """,
+        recipe_id,
+        ingredient_ids,
+        amounts,
+    )
+
+
 async def get_with_author(conn: asyncpg.Connection, item_id: int) -> Dict[str, Any] | None:
     record = await conn.fetchrow(
         """
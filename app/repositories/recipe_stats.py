@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import asyncpg
+
+
+async def get_for_recipe(conn: asyncpg.Connection, recipe_id: int) -> Optional[Dict[str, Any]]:
+    record = await conn.fetchrow(
+        """
+        SELECT r.id AS recipe_id, r.views,
+               COALESCE(s.likes_count, 0) AS likes_count,
+               COALESCE(s.comments_count, 0) AS comments_count,
+               COALESCE(s.rating_sum, 0) AS rating_sum,
+               COALESCE(s.rating_count, 0) AS rating_count
+        FROM recipes r
+        LEFT JOIN recipe_stats s ON s.recipe_id = r.id
+        WHERE r.id = $1
+        """,
+        recipe_id,
+    )
+    return dict(record) if record else None
+
+
+async def rebuild(conn: asyncpg.Connection) -> int:
+    """
+    Recount every recipe's counters from the source tables. Must run inside a
+    transaction: the source tables are locked against writes until it commits.
+    """
+    await conn.execute("LOCK TABLE favorites, comments, ratings IN SHARE MODE")
+    result = await conn.execute(
+        """
+        INSERT INTO recipe_stats (recipe_id, likes_count, comments_count, rating_sum, rating_count)
+        SELECT r.id,
+               COALESCE(f.count, 0),
+               COALESCE(c.count, 0),
+               COALESCE(ra.sum, 0),
+               COALESCE(ra.count, 0)
+        FROM recipes r
+        LEFT JOIN (SELECT recipe_id, COUNT(*) AS count FROM favorites GROUP BY recipe_id) f ON f.recipe_id = r.id
+        LEFT JOIN (SELECT recipe_id, COUNT(*) AS count FROM comments GROUP BY recipe_id) c ON c.recipe_id = r.id
+        LEFT JOIN (
+            SELECT recipe_id, SUM(rate) AS sum, COUNT(*) AS count FROM ratings GROUP BY recipe_id
+        ) ra ON ra.recipe_id = r.id
+        ON CONFLICT (recipe_id) DO UPDATE SET
+            likes_count = EXCLUDED.likes_count,
+            comments_count = EXCLUDED.comments_count,
+            rating_sum = EXCLUDED.rating_sum,
+            rating_count = EXCLUDED.rating_count
+        """
+    )
+    return int(result.split()[-1])
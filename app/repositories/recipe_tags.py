@@ -23,6 +23,19 @@ async def list_items(conn: asyncpg.Connection, recipe_id: Optional[int] = None)
     return [dict(r) for r in records]
 
 
+async def list_for_recipes(conn: asyncpg.Connection, recipe_ids: List[int]) -> List[Dict[str, Any]]:
+    records = await conn.fetch(
+        """
+        SELECT rt.recipe_id, rt.tag_id
+        FROM recipe_tag rt
+        WHERE rt.recipe_id = ANY($1::int[])
+        ORDER BY rt.recipe_id, rt.created_at DESC
+        """,
+        recipe_ids,
+    )
+    return [dict(r) for r in records]
+
+
 async def upsert_item(conn: asyncpg.Connection, recipe_id: int, tag_id: int) -> Dict[str, Any]:
     record = await conn.fetchrow(
         """
@@ -38,6 +51,23 @@ async def upsert_item(conn: asyncpg.Connection, recipe_id: int, tag_id: int) ->
     return dict(record)
 
 
+async def sync_for_recipe(conn: asyncpg.Connection, recipe_id: int, tag_ids: List[int]) -> None:
+    """Make the recipe's links exactly ``tag_ids``, leaving unchanged links untouched."""
+    await conn.execute(
+        """
+        WITH removed AS (
+            DELETE FROM recipe_tag
+            WHERE recipe_id = $1 AND tag_id <> ALL($2::int[])
+        )
+        INSERT INTO recipe_tag (recipe_id, tag_id)
+        SELECT $1, tag_id FROM unnest($2::int[]) AS tag_id
+        ON CONFLICT (recipe_id, tag_id) DO NOTHING
+        """,
+        recipe_id,
+        tag_ids,
+    )
+
+
 async def get_with_author(conn: asyncpg.Connection, item_id: int) -> Dict[str, Any] | None:
     record = await conn.fetchrow(
         """
@@ -1,22 +1,53 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import os
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import asyncpg
 
+from app.repositories.utils import iter_chunks, keyset_condition
 
-async def list_recipes(conn: asyncpg.Connection, q: str | None, limit: int, offset: int, sort: str | None = None) -> List[Dict[str, Any]]:
-    order = "views DESC, pub_date DESC" if sort == "popular" else "pub_date DESC"
+USER_RECIPES_CURSOR_KEYS = ("pub_date", "id")
+SEARCH_FTS = "fts"
+FTS_CONFIG = os.getenv("FTS_CONFIG", "simple")
+if not re.fullmatch(r"[a-z_][a-z0-9_]*", FTS_CONFIG):
+    raise ValueError(f"Invalid FTS_CONFIG: {FTS_CONFIG!r}")
+
+
+def cursor_keys(sort: str | None = None, search: str | None = None) -> tuple[str, ...]:
+    if search == SEARCH_FTS:
+        return ("rank", "pub_date", "id")
+    return ("popularity_score", "id") if sort == "popular" else ("pub_date", "id")
+
+
+async def list_recipes(
+    conn: asyncpg.Connection,
+    q: str | None,
+    limit: int,
+    offset: int,
+    sort: str | None = None,
+    after: List[Any] | None = None,
+    search: str | None = None,
+) -> List[Dict[str, Any]]:
+    if q and search == SEARCH_FTS:
+        return await _search_recipes(conn, q, limit, offset, after)
+
+    keys = cursor_keys(sort)
+    order = ", ".join(f"{key} DESC" for key in keys)
     base_query = f"""
-        SELECT views, id, author_id, name, image, text, cooking_time, pub_date
+        SELECT views, id, author_id, name, image, text, cooking_time, pub_date, popularity_score
         FROM recipes
     """
     params: List[Any] = []
-    where_clause = ""
+    conditions = []
     if q:
-        where_clause = "WHERE LOWER(name) LIKE $1 OR LOWER(text) LIKE $1"
         params.append(f"%{q.lower()}%")
+        conditions.append("(LOWER(name) LIKE $1 OR LOWER(text) LIKE $1)")
+    if after is not None:
+        conditions.append(keyset_condition(keys, after, params))
 
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     params.extend([limit, offset])
     query = f"""
         {base_query}
@@ -28,35 +59,167 @@ async def list_recipes(conn: asyncpg.Connection, q: str | None, limit: int, offs
     return [dict(r) for r in records]
 
 
-async def list_user_recipes(conn: asyncpg.Connection, user_id: int, q: str | None, limit: int, offset: int) -> List[Dict[str, Any]]:
-    params = [user_id]
+async def _search_recipes(
+    conn: asyncpg.Connection,
+    q: str,
+    limit: int,
+    offset: int,
+    after: List[Any] | None = None,
+) -> List[Dict[str, Any]]:
+    """Full-text search over the weighted search_vector column, best matches first."""
+    params: List[Any] = [FTS_CONFIG, q]
+    where = "search_vector @@ query"
+    if after is not None:
+        where += " AND " + keyset_condition(["ts_rank(search_vector, query)", "pub_date", "id"], after, params)
+
+    params.extend([limit, offset])
+    query = f"""
+        SELECT views, id, author_id, name, image, text, cooking_time, pub_date,
+               ts_rank(search_vector, query) AS rank
+        FROM recipes, websearch_to_tsquery($1::regconfig, $2) AS query
+        WHERE {where}
+        ORDER BY rank DESC, pub_date DESC, id DESC
+        LIMIT ${len(params)-1} OFFSET ${len(params)}
+    """
+    records = await conn.fetch(query, *params)
+    return [dict(r) for r in records]
+
+
+async def list_user_recipes(
+    conn: asyncpg.Connection,
+    user_id: int,
+    q: str | None,
+    limit: int,
+    offset: int,
+    after: List[Any] | None = None,
+) -> List[Dict[str, Any]]:
+    params: List[Any] = [user_id]
     where = "r.author_id = $1"
     if q:
         params.append(f"%{q.lower()}%")
         where += f" AND (LOWER(r.name) LIKE ${len(params)} OR LOWER(r.text) LIKE ${len(params)})"
+    if after is not None:
+        where += " AND " + keyset_condition(["r.pub_date", "r.id"], after, params)
 
     params.extend([limit, offset])
     query = f"""
-        SELECT r.id, r.author_id, r.name, r.image, r.text, r.cooking_time, r.pub_date,
+        SELECT r.views, r.id, r.author_id, r.name, r.image, r.text, r.cooking_time, r.pub_date,
                u.email, u.first_name, u.last_name, u.avatar
         FROM recipes r
         JOIN users u ON u.id = r.author_id
         WHERE {where}
-        ORDER BY r.pub_date DESC
+        ORDER BY r.pub_date DESC, r.id DESC
+        LIMIT ${len(params)-1} OFFSET ${len(params)}
+    """
+    records = await conn.fetch(query, *params)
+    return [dict(r) for r in records]
+
+
+async def list_feed(
+    conn: asyncpg.Connection,
+    user_id: int,
+    limit: int,
+    offset: int,
+    after: List[Any] | None = None,
+) -> List[Dict[str, Any]]:
+    """Recipes by the authors ``user_id`` follows, newest first."""
+    params: List[Any] = [user_id]
+    where = "s.user_id = $1"
+    if after is not None:
+        where += " AND " + keyset_condition(["r.pub_date", "r.id"], after, params)
+
+    params.extend([limit, offset])
+    query = f"""
+        SELECT r.views, r.id, r.author_id, r.name, r.image, r.text, r.cooking_time, r.pub_date
+        FROM subscriptions s
+        JOIN recipes r ON r.author_id = s.following_id
+        WHERE {where}
+        ORDER BY r.pub_date DESC, r.id DESC
         LIMIT ${len(params)-1} OFFSET ${len(params)}
     """
     records = await conn.fetch(query, *params)
     return [dict(r) for r in records]
 
 
+def iter_user_recipes(conn: asyncpg.Connection, user_id: int, chunk_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    return iter_chunks(
+        conn,
+        """
+        SELECT views, id, author_id, name, image, text, cooking_time, pub_date
+        FROM recipes
+        WHERE author_id = $1
+        ORDER BY pub_date DESC, id DESC
+        """,
+        user_id,
+        chunk_size=chunk_size,
+    )
+
+
+async def refresh_popularity(
+    conn: asyncpg.Connection,
+    after_id: int,
+    batch_size: int,
+    weights: tuple[float, float, float],
+    gravity: float,
+) -> Optional[int]:
+    """
+    Recompute popularity_score for the next ``batch_size`` recipes after
+    ``after_id``: weighted views, favorites and rating points divided by
+    (age in hours + 2) ** gravity. Returns the last id handled, None when done.
+    """
+    views_weight, favorites_weight, ratings_weight = weights
+    return await conn.fetchval(
+        """
+        WITH batch AS (
+            SELECT id FROM recipes WHERE id > $1 ORDER BY id LIMIT $2
+        ), scored AS (
+            SELECT r.id,
+                   ($3::float8 * r.views
+                    + $4::float8 * COALESCE(s.likes_count, 0)
+                    + $5::float8 * COALESCE(s.rating_sum, 0))
+                   -- Clamped: a pub_date in the future would make the base negative and power() raise.
+                   / power(GREATEST(EXTRACT(EPOCH FROM (NOW() - r.pub_date))::float8 / 3600, 0) + 2, $6::float8)
+                   AS score
+            FROM batch b
+            JOIN recipes r ON r.id = b.id
+            LEFT JOIN recipe_stats s ON s.recipe_id = r.id
+        ), updated AS (
+            UPDATE recipes r
+            SET popularity_score = scored.score
+            FROM scored
+            WHERE r.id = scored.id AND r.popularity_score IS DISTINCT FROM scored.score
+        )
+        SELECT max(id) FROM batch
+        """,
+        after_id,
+        batch_size,
+        views_weight,
+        favorites_weight,
+        ratings_weight,
+        gravity,
+    )
+
+
 async def get_by_id(conn: asyncpg.Connection, recipe_id: int) -> Optional[Dict[str, Any]]:
     record = await conn.fetchrow(
-        "SELECT id, author_id, name, image, text, cooking_time, pub_date, views FROM recipes WHERE id = $1",
+        "SELECT id, author_id, name, image, text, cooking_time, pub_date, views, version FROM recipes WHERE id = $1",
         recipe_id,
     )
     return dict(record) if record else None
 
 
+async def get_by_ids(conn: asyncpg.Connection, recipe_ids: List[int]) -> List[Dict[str, Any]]:
+    records = await conn.fetch(
+        """
+        SELECT id, author_id, name, image, text, cooking_time, pub_date, views, version
+        FROM recipes
+        WHERE id = ANY($1::int[])
+        """,
+        recipe_ids,
+    )
+    return [dict(r) for r in records]
+
+
 async def create_recipe(
     conn: asyncpg.Connection,
     *,
@@ -89,7 +252,7 @@ async def update_recipe(
     image: str,
     text: str,
     cooking_time: int,
-) -> Dict[str, Any]:
+) -> Optional[Dict[str, Any]]:
     record = await conn.fetchrow(
         """
         UPDATE recipes
@@ -103,11 +266,20 @@ async def update_recipe(
         cooking_time,
         recipe_id,
     )
-    return dict(record)
+    return dict(record) if record else None
 
 
-async def increment_views(conn: asyncpg.Connection, recipe_id: int) -> None:
-    await conn.execute("UPDATE recipes SET views = views + 1 WHERE id = $1", recipe_id)
+async def add_views(conn: asyncpg.Connection, recipe_ids: List[int], counts: List[int]) -> None:
+    await conn.execute(
+        """
+        UPDATE recipes r
+        SET views = r.views + v.count
+        FROM unnest($1::int[], $2::int[]) AS v(id, count)
+        WHERE r.id = v.id
+        """,
+        recipe_ids,
+        counts,
+    )
 
 
 async def delete_recipe(conn: asyncpg.Connection, recipe_id: int) -> str:
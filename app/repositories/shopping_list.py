@@ -1,17 +1,30 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import asyncpg
 
+from app.repositories.utils import keyset_condition
 
-async def list_items(conn: asyncpg.Connection, user_id: int, q: str | None, limit: int, offset: int) -> List[Dict[str, Any]]:
+CURSOR_KEYS = ("id",)
+
+
+async def list_items(
+    conn: asyncpg.Connection,
+    user_id: int,
+    q: str | None,
+    limit: int,
+    offset: int,
+    after: Optional[List[Any]] = None,
+) -> List[Dict[str, Any]]:
     params: list[Any] = [user_id]
     where = "sl.user_id = $1"
     join = "JOIN recipes r ON r.id = sl.recipe_id"
     if q:
         params.append(f"%{q.lower()}%")
         where += f" AND LOWER(r.name) LIKE ${len(params)}"
+    if after is not None:
+        where += " AND " + keyset_condition(["sl.id"], after, params, descending=False)
 
     params.extend([limit, offset])
     query = f"""
@@ -26,6 +39,22 @@ async def list_items(conn: asyncpg.Connection, user_id: int, q: str | None, limi
     return [dict(r) for r in records]
 
 
+async def list_ingredient_totals(conn: asyncpg.Connection, user_id: int) -> List[Dict[str, Any]]:
+    records = await conn.fetch(
+        """
+        SELECT i.name, i.measurement_unit, SUM(ri.amount)::int AS amount
+        FROM shopping_list sl
+        JOIN recipe_ingredients ri ON ri.recipe_id = sl.recipe_id
+        JOIN ingredients i ON i.id = ri.ingredient_id
+        WHERE sl.user_id = $1
+        GROUP BY i.id
+        ORDER BY i.name, i.measurement_unit
+        """,
+        user_id,
+    )
+    return [dict(r) for r in records]
+
+
 async def add_item(conn: asyncpg.Connection, user_id: int, recipe_id: int) -> Dict[str, Any]:
     record = await conn.fetchrow(
         """
@@ -1,16 +1,29 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import asyncpg
 
+from app.repositories.utils import keyset_condition
 
-async def list_subscriptions(conn: asyncpg.Connection, user_id: int, q: str | None, limit: int, offset: int) -> List[Dict[str, Any]]:
+CURSOR_KEYS = ("added_at", "id")
+
+
+async def list_subscriptions(
+    conn: asyncpg.Connection,
+    user_id: int,
+    q: str | None,
+    limit: int,
+    offset: int,
+    after: Optional[List[Any]] = None,
+) -> List[Dict[str, Any]]:
     params: list[Any] = [user_id]
     where = "s.user_id = $1"
     if q:
         params.append(f"%{q.lower()}%")
         where += f" AND (LOWER(u.first_name) LIKE ${len(params)} OR LOWER(u.last_name) LIKE ${len(params)})"
+    if after is not None:
+        where += " AND " + keyset_condition(["s.added_at", "s.id"], after, params)
     params.extend([limit, offset])
     query = f"""
         SELECT s.id, s.user_id, s.following_id, s.added_at,
@@ -18,19 +31,28 @@ async def list_subscriptions(conn: asyncpg.Connection, user_id: int, q: str | No
         FROM subscriptions s
         JOIN users u ON u.id = s.following_id
         WHERE {where}
-        ORDER BY s.added_at DESC
+        ORDER BY s.added_at DESC, s.id DESC
         LIMIT ${len(params)-1} OFFSET ${len(params)}
     """
     records = await conn.fetch(query, *params)
     return [dict(r) for r in records]
 
 
-async def list_followers(conn: asyncpg.Connection, user_id: int, q: str | None, limit: int, offset: int) -> List[Dict[str, Any]]:
+async def list_followers(
+    conn: asyncpg.Connection,
+    user_id: int,
+    q: str | None,
+    limit: int,
+    offset: int,
+    after: Optional[List[Any]] = None,
+) -> List[Dict[str, Any]]:
     params: list[Any] = [user_id]
     where = "s.following_id = $1"
     if q:
         params.append(f"%{q.lower()}%")
         where += f" AND (LOWER(u.first_name) LIKE ${len(params)} OR LOWER(u.last_name) LIKE ${len(params)})"
+    if after is not None:
+        where += " AND " + keyset_condition(["s.added_at", "s.id"], after, params)
     params.extend([limit, offset])
     query = f"""
         SELECT s.id, s.user_id, s.following_id, s.added_at,
@@ -38,7 +60,7 @@ async def list_followers(conn: asyncpg.Connection, user_id: int, q: str | None,
         FROM subscriptions s
         JOIN users u ON u.id = s.user_id
         WHERE {where}
-        ORDER BY s.added_at DESC
+        ORDER BY s.added_at DESC, s.id DESC
         LIMIT ${len(params)-1} OFFSET ${len(params)}
     """
     records = await conn.fetch(query, *params)
@@ -4,31 +4,80 @@ from typing import Any, Dict, Optional
 
 import asyncpg
 
+from app.repositories.utils import SEARCH_FUZZY
 
-async def list_tags(conn: asyncpg.Connection, q: str | None, limit: int, offset: int) -> list[Dict[str, Any]]:
+
+async def list_tags(
+    conn: asyncpg.Connection,
+    q: str | None,
+    limit: int,
+    offset: int,
+    search: str | None = None,
+) -> list[Dict[str, Any]]:
     base = "SELECT id, name FROM tags"
     where = ""
+    order = "name"
     params: list[Any] = []
-    if q:
+    if q and search == SEARCH_FUZZY:
+        where = "WHERE LOWER(name) % $1"
+        order = "similarity(LOWER(name), $1) DESC, name"
+        params.append(q.lower())
+    elif q:
         where = "WHERE LOWER(name) LIKE $1"
         params.append(f"%{q.lower()}%")
 
     params.extend([limit, offset])
-    query = f"{base} {where} ORDER BY name LIMIT ${len(params)-1} OFFSET ${len(params)}"
+    query = f"{base} {where} ORDER BY {order} LIMIT ${len(params)-1} OFFSET ${len(params)}"
     records = await conn.fetch(query, *params)
     return [dict(r) for r in records]
 
 
+async def list_all(conn: asyncpg.Connection, limit: int) -> list[Dict[str, Any]]:
+    records = await conn.fetch("SELECT id, name FROM tags ORDER BY id LIMIT $1", limit)
+    return [dict(r) for r in records]
+
+
 async def get_by_id(conn: asyncpg.Connection, tag_id: int) -> Optional[Dict[str, Any]]:
     record = await conn.fetchrow("SELECT id, name FROM tags WHERE id = $1", tag_id)
     return dict(record) if record else None
 
 
+async def get_by_ids(conn: asyncpg.Connection, tag_ids: list[int]) -> list[Dict[str, Any]]:
+    records = await conn.fetch("SELECT id, name FROM tags WHERE id = ANY($1::int[])", tag_ids)
+    return [dict(r) for r in records]
+
+
 async def get_by_name(conn: asyncpg.Connection, name: str) -> Optional[Dict[str, Any]]:
     record = await conn.fetchrow("SELECT id, name FROM tags WHERE LOWER(name) = LOWER($1)", name)
     return dict(record) if record else None
 
 
+async def get_by_names(conn: asyncpg.Connection, names: list[str]) -> list[Dict[str, Any]]:
+    records = await conn.fetch("SELECT id, name FROM tags WHERE name = ANY($1::text[])", names)
+    return [dict(r) for r in records]
+
+
+async def ensure_tags(conn: asyncpg.Connection, names: list[str]) -> list[Dict[str, Any]]:
+    """Insert the missing names and return id/name for all of them. ``names`` must be lowercase."""
+    records = await conn.fetch(
+        """
+        WITH wanted AS (
+            SELECT DISTINCT unnest($1::text[]) AS name
+        ), inserted AS (
+            INSERT INTO tags (name)
+            SELECT name FROM wanted
+            ON CONFLICT (name) DO NOTHING
+            RETURNING id, name
+        )
+        SELECT id, name FROM inserted
+        UNION ALL
+        SELECT t.id, t.name FROM tags t JOIN wanted w ON w.name = t.name
+        """,
+        names,
+    )
+    return [dict(r) for r in records]
+
+
 async def create_tag(conn: asyncpg.Connection, name: str) -> Dict[str, Any]:
     normalized = name.lower()
     record = await conn.fetchrow("INSERT INTO tags (name) VALUES ($1) RETURNING id, name", normalized)
@@ -47,3 +96,8 @@ async def update_tag(conn: asyncpg.Connection, tag_id: int, name: str) -> Dict[s
 
 async def delete_tag(conn: asyncpg.Connection, tag_id: int) -> str:
     return await conn.execute("DELETE FROM tags WHERE id = $1", tag_id)
+
+
+async def get_version(conn: asyncpg.Connection) -> int:
+    """Committed catalog version, bumped by a trigger on every write to the table."""
+    return await conn.fetchval("SELECT version FROM catalog_versions WHERE name = 'tags'")
@@ -4,15 +4,29 @@ from typing import Any, Dict, Optional
 
 import asyncpg
 
+from app.repositories.utils import SEARCH_FUZZY
+
 
 async def get_by_id(conn: asyncpg.Connection, user_id: int) -> Optional[Dict[str, Any]]:
     record = await conn.fetchrow(
-        "SELECT id, username, email, first_name, last_name, avatar, password_hash FROM users WHERE id = $1",
+        "SELECT id, username, email, first_name, last_name, avatar, password_hash, version FROM users WHERE id = $1",
         user_id,
     )
     return dict(record) if record else None
 
 
+async def get_by_ids(conn: asyncpg.Connection, user_ids: list[int]) -> list[Dict[str, Any]]:
+    records = await conn.fetch(
+        """
+        SELECT id, username, email, first_name, last_name, avatar, password_hash, version
+        FROM users
+        WHERE id = ANY($1::int[])
+        """,
+        user_ids,
+    )
+    return [dict(r) for r in records]
+
+
 async def get_by_email(conn: asyncpg.Connection, email: str) -> Optional[Dict[str, Any]]:
     record = await conn.fetchrow(
         "SELECT id, username, email, first_name, last_name, avatar, password_hash FROM users WHERE email = $1",
@@ -47,14 +61,25 @@ async def create_user(
     return dict(record)
 
 
-async def list_users(conn: asyncpg.Connection, q: str | None, limit: int, offset: int) -> list[Dict[str, Any]]:
+async def list_users(
+    conn: asyncpg.Connection,
+    q: str | None,
+    limit: int,
+    offset: int,
+    search: str | None = None,
+) -> list[Dict[str, Any]]:
     base_query = """
         SELECT id, email, first_name, last_name, avatar
         FROM users
     """
     where_clause = ""
+    order = "id"
     params: list[Any] = []
-    if q:
+    if q and search == SEARCH_FUZZY:
+        where_clause = "WHERE LOWER(first_name) % $1 OR LOWER(last_name) % $1"
+        order = "GREATEST(similarity(LOWER(first_name), $1), similarity(LOWER(last_name), $1)) DESC, id"
+        params.append(q.lower())
+    elif q:
         where_clause = "WHERE LOWER(first_name) LIKE $1 OR LOWER(last_name) LIKE $1"
         params.append(f"%{q.lower()}%")
 
@@ -62,7 +87,7 @@ async def list_users(conn: asyncpg.Connection, q: str | None, limit: int, offset
     query = f"""
         {base_query}
         {where_clause}
-        ORDER BY id
+        ORDER BY {order}
         LIMIT ${len(params)-1} OFFSET ${len(params)}
     """
     records = await conn.fetch(query, *params)
@@ -1,4 +1,30 @@
+from typing import Any, AsyncIterator, Dict, List, Sequence
+
+import asyncpg
+
+SEARCH_FUZZY = "fuzzy"
 
 
 def row_affected(result: str) -> bool:
     return not result.endswith("0")
+
+
+def keyset_condition(columns: Sequence[str], after: Sequence[Any], params: list[Any], descending: bool = True) -> str:
+    """Build a row-comparison predicate that starts a page right after the ``after`` sort key."""
+    start = len(params)
+    params.extend(after)
+    placeholders = ", ".join(f"${start + i + 1}" for i in range(len(columns)))
+    operator = "<" if descending else ">"
+    return f"({', '.join(columns)}) {operator} ({placeholders})"
+
+
+async def iter_chunks(
+    conn: asyncpg.Connection, query: str, *args: Any, chunk_size: int
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Stream ``query`` through a server-side cursor. Must run inside a transaction."""
+    cursor = await conn.cursor(query, *args)
+    while True:
+        records = await cursor.fetch(chunk_size)
+        if not records:
+            return
+        yield [dict(r) for r in records]
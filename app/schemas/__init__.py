@@ -12,15 +12,25 @@ from .recipes import (
     RecipeIngredient,
     RecipeIngredientBase,
     RecipeIngredientInput,
+    RecipeIngredientRow,
+    RecipeRow,
     RecipeTag,
     RecipeTagBase,
 )
-from .shopping_list import ShoppingListCreate, ShoppingListItem
+from .shopping_list import ShoppingListCreate, ShoppingListIngredient, ShoppingListItem
 from .shopping_list_response import ShoppingListResponse
 from .subscriptions import Subscription, SubscriptionCreate
 from .subscriptions_response import FollowersResponse, SubscriptionsResponse
 from .tags import Tag, TagBase, TagCreate, TagUpdate
-from .users import User, UserBase, UserCreate, UserUpdate
-from .user_recipes import UserRecipesResponse
-from .stats import IngredientStatsResponse, RecipeStatsResponse, UserStatsResponse
+from .users import User, UserBase, UserCreate, UserRow, UserUpdate
+from .user_recipes import UserRecipesResponse, UserRecipesRow
+from .stats import (
+    CacheStats,
+    IngredientStatsResponse,
+    PasswordHasherStats,
+    RecipeStatsResponse,
+    RuntimeStatsResponse,
+    UserStatsResponse,
+)
 from .favorites_list import FavoritesListResponse
+from .feed import FeedResponse, FeedRow
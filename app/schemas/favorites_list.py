@@ -8,3 +8,4 @@ from .favorites import Favorite
 class FavoritesListResponse(BaseModel):
     count: int
     favorites: list[Favorite]
+    next_cursor: str | None = None
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from pydantic import BaseModel
+from typing_extensions import TypedDict
+
+from .recipes import Recipe, RecipeRow
+
+
+class FeedResponse(BaseModel):
+    count: int
+    recipes: list[Recipe]
+    next_cursor: str | None = None
+
+
+class FeedRow(TypedDict):
+    count: int
+    recipes: list[RecipeRow]
+    next_cursor: Optional[str]
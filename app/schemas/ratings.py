@@ -22,3 +22,4 @@ class Rating(BaseModel):
 class RatingsResponse(BaseModel):
     avg_rate: float
     ratings: list[Rating]
+    next_cursor: str | None = None
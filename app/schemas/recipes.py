@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Optional
 
 from pydantic import BaseModel, ConfigDict, Field
+from typing_extensions import TypedDict
 
 
 class RecipeIngredientInput(BaseModel):
@@ -40,6 +41,7 @@ class Recipe(BaseModel):
     pub_date: datetime
     name: str
     image: str
+    image_variants: dict[str, str] | None = None
     text: str
     cooking_time: int
     tags: list[str] = Field(default_factory=list)
@@ -48,6 +50,30 @@ class Recipe(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class RecipeIngredientRow(TypedDict):
+    ingredient_id: int
+    amount: int
+
+
+class RecipeRow(TypedDict):
+    """
+    Serialization-only mirror of ``Recipe`` for rows the services already
+    built (see app.core.serialization); keep the two in sync.
+    """
+
+    views: int
+    id: int
+    author_id: int
+    pub_date: datetime
+    name: str
+    image: str
+    image_variants: Optional[dict[str, str]]
+    text: str
+    cooking_time: int
+    tags: list[str]
+    ingredients: list[RecipeIngredientRow]
+
+
 class RecipeIngredientBase(BaseModel):
     recipe_id: int
     ingredient_id: int
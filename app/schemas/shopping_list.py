@@ -13,3 +13,9 @@ class ShoppingListItem(BaseModel):
     user_id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ShoppingListIngredient(BaseModel):
+    name: str
+    measurement_unit: str
+    amount: int
@@ -8,3 +8,4 @@ from .shopping_list import ShoppingListItem
 class ShoppingListResponse(BaseModel):
     count: int
     shopping_list: list[ShoppingListItem]
+    next_cursor: str | None = None
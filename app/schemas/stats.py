@@ -14,7 +14,28 @@ class UserStatsResponse(BaseModel):
     likes: int
     subscribers: int
     comments: int
+    recipes: int = 0
 
 
 class IngredientStatsResponse(BaseModel):
     uses: int
+
+
+class PasswordHasherStats(BaseModel):
+    calls: int
+    rejected: int
+    avg_wait: float
+    max_wait: float
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    size: int
+
+
+class RuntimeStatsResponse(BaseModel):
+    """Counters of the worker process that served the request."""
+
+    password_hasher: PasswordHasherStats
+    auth_user_cache: CacheStats
@@ -8,8 +8,10 @@ from .users import User
 class SubscriptionsResponse(BaseModel):
     count: int
     subscriptions: list[User]
+    next_cursor: str | None = None
 
 
 class FollowersResponse(BaseModel):
     count: int
     followers: list[User]
+    next_cursor: str | None = None
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+from typing import Optional
+
 from pydantic import BaseModel
+from typing_extensions import TypedDict
 
-from .recipes import Recipe
-from .users import User
+from .recipes import Recipe, RecipeRow
+from .users import User, UserRow
 
 
 class UserRecipesResponse(BaseModel):
     user: User
     recipes: list[Recipe]
+    next_cursor: str | None = None
+
+
+class UserRecipesRow(TypedDict):
+    user: UserRow
+    recipes: list[RecipeRow]
+    next_cursor: Optional[str]
@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import Optional
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from typing_extensions import TypedDict
 
 
 class UserBase(BaseModel):
@@ -29,5 +30,17 @@ class User(BaseModel):
     first_name: str
     last_name: str
     avatar: Optional[str] = None
+    avatar_variants: Optional[dict[str, str]] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class UserRow(TypedDict):
+    """Serialization-only mirror of ``User``; keep the two in sync."""
+
+    id: int
+    email: str
+    first_name: str
+    last_name: str
+    avatar: Optional[str]
+    avatar_variants: Optional[dict[str, str]]
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import asyncpg
 from fastapi import HTTPException, status
 
-from app.core.security import create_access_token, create_refresh_token, get_password_hash, verify_password
+from app.core.security import create_access_token, create_refresh_token, password_hasher
 from app.repositories import users as users_repo
 from app.schemas import TokenResponse, UserCreate
 from app.services.files import process_image_input
@@ -18,21 +19,27 @@ async def register_user(connection, payload: UserCreate) -> TokenResponse:
     existing = await users_repo.get_by_email(connection, payload.email)
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User with this email already exists")
+    # Don't hold a pooled connection while waiting for bcrypt.
+    await connection.release()
 
     try:
-        password_hash = get_password_hash(payload.password)
+        password_hash = await password_hasher.hash(payload.password)
     except ValueError as exc:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail=str(exc))
-    avatar_url = process_image_input(payload.avatar, subdir="avatars") if payload.avatar else None
-    record = await users_repo.create_user(
-        connection,
-        username=payload.email,
-        email=payload.email,
-        first_name=payload.first_name,
-        last_name=payload.last_name,
-        avatar=avatar_url,
-        password_hash=password_hash,
-    )
+    avatar_url = await process_image_input(payload.avatar, subdir="avatars") if payload.avatar else None
+    try:
+        record = await users_repo.create_user(
+            connection,
+            username=payload.email,
+            email=payload.email,
+            first_name=payload.first_name,
+            last_name=payload.last_name,
+            avatar=avatar_url,
+            password_hash=password_hash,
+        )
+    except asyncpg.UniqueViolationError:
+        # The check above ran in an earlier transaction; a concurrent registration may have won since.
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User with this email already exists")
     user = _sanitize_user(record)
     access = create_access_token(user["id"])
     refresh = create_refresh_token(user["id"])
@@ -43,8 +50,9 @@ async def login_user(connection, email: str, password: str) -> TokenResponse:
     user_record = await users_repo.get_by_email(connection, email)
     if not user_record:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    await connection.release()
     try:
-        password_ok = verify_password(password, user_record["password_hash"])
+        password_ok = await password_hasher.verify(password, user_record["password_hash"])
     except ValueError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     if not password_ok:
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from app.core.cache import TTLCache
+from app.repositories import ingredients as ingredients_repo
+from app.repositories import tags as tags_repo
+
+
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "50000"))
+
+Row = Dict[str, Any]
+
+
+class Catalog:
+    """
+    Process-wide id->row and name->row cache for a reference table.
+    Misses fall through to one batch query; the TTL bounds how long other
+    workers can serve a row after it changed. Writers only ``discard_on_commit``
+    — rows are cached when read back, so a rolled-back insert never lingers
+    and a reader racing the write cannot re-cache the old row.
+    Cached rows are shared; callers must not mutate them.
+    """
+
+    def __init__(
+        self,
+        fetch_by_ids: Callable[[Any, List[int]], Awaitable[List[Row]]],
+        fetch_by_name: Callable[[Any, str], Awaitable[Optional[Row]]],
+        fetch_all: Callable[[Any, int], Awaitable[List[Row]]],
+        maxsize: int,
+        ttl: Optional[float],
+    ) -> None:
+        self._fetch_by_ids = fetch_by_ids
+        self._fetch_by_name = fetch_by_name
+        self._fetch_all = fetch_all
+        self.by_id = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.by_name = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def warm(self, connection) -> int:
+        rows = await self._fetch_all(connection, self.by_id.maxsize)
+        for row in rows:
+            self.add(row)
+        return len(rows)
+
+    def add(self, row: Row) -> None:
+        self.by_id.set(row["id"], row)
+        self.by_name.set(row["name"].lower(), row)
+
+    def discard(self, row_id: int, name: Optional[str] = None) -> None:
+        cached = self.by_id.get(row_id)
+        self.by_id.pop(row_id)
+        for stale in (name, cached["name"] if cached else None):
+            if stale:
+                self.by_name.pop(stale.lower())
+
+    def discard_on_commit(self, connection, row_id: int, name: Optional[str] = None) -> None:
+        async def discard() -> None:
+            self.discard(row_id, name)
+
+        connection.on_commit(discard)
+
+    def clear(self) -> None:
+        self.by_id.clear()
+        self.by_name.clear()
+
+    async def get(self, connection, row_id: int) -> Optional[Row]:
+        found = await self.get_many(connection, [row_id])
+        return found.get(row_id)
+
+    async def get_many(self, connection, ids: Iterable[int]) -> Dict[int, Row]:
+        found: Dict[int, Row] = {}
+        missing: List[int] = []
+        for row_id in dict.fromkeys(ids):
+            row = self.by_id.get(row_id)
+            if row is None:
+                missing.append(row_id)
+            else:
+                found[row_id] = row
+        if missing:
+            for row in await self._fetch_by_ids(connection, missing):
+                self.add(row)
+                found[row["id"]] = row
+        return found
+
+    async def get_by_name(self, connection, name: str) -> Optional[Row]:
+        row = self.by_name.get(name.lower())
+        if row is None:
+            row = await self._fetch_by_name(connection, name)
+            if row is not None:
+                self.add(row)
+        return row
+
+
+tag_catalog = Catalog(
+    tags_repo.get_by_ids,
+    tags_repo.get_by_name,
+    tags_repo.list_all,
+    maxsize=CATALOG_CACHE_SIZE,
+    ttl=CATALOG_CACHE_TTL,
+)
+ingredient_catalog = Catalog(
+    ingredients_repo.get_by_ids,
+    ingredients_repo.get_by_name,
+    ingredients_repo.list_all,
+    maxsize=CATALOG_CACHE_SIZE,
+    ttl=CATALOG_CACHE_TTL,
+)
+
+
+async def warm_catalogs(connection) -> None:
+    await tag_catalog.warm(connection)
+    await ingredient_catalog.warm(connection)
@@ -2,21 +2,32 @@ from __future__ import annotations
 
 from fastapi import HTTPException, status
 
+from app.loaders import get_loaders
 from app.repositories import comments as comments_repo
-from app.repositories import recipes as recipes_repo
 from app.repositories.utils import row_affected
 from app.services.files import process_image_input
+from app.services.pagination import decode_cursor, next_cursor
 
 
-async def list_comments(connection, recipe_id: int | None, q: str | None, limit: int, offset: int) -> list[dict]:
-    return await comments_repo.list_comments(connection, recipe_id, q=q, limit=limit, offset=offset)
+async def list_comments(
+    connection,
+    recipe_id: int | None,
+    q: str | None,
+    limit: int,
+    offset: int,
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    after = decode_cursor(cursor, comments_repo.CURSOR_KEYS)
+    comments = await comments_repo.list_comments(connection, recipe_id, q=q, limit=limit, offset=offset, after=after)
+    return comments, next_cursor(comments, limit, comments_repo.CURSOR_KEYS)
 
 
 async def create_comment(connection, *, user_id: int, recipe_id: int, text: str | None, image: str | None) -> dict:
-    recipe = await recipes_repo.get_by_id(connection, recipe_id)
+    # Store the image before the first query so the transaction isn't held open during the write.
+    image_url = await process_image_input(image, subdir="comments") if image else None
+    recipe = await get_loaders(connection).recipes.load(recipe_id)
     if not recipe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
-    image_url = process_image_input(image, subdir="comments") if image else None
     return await comments_repo.create_comment(
         connection,
         user_id=user_id,
@@ -55,7 +66,11 @@ async def update_comment(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You can only edit your own comments")
 
     new_text = text if text is not None else comment.get("text")
-    new_image = process_image_input(image, subdir="comments") if image is not None else comment.get("image")
+    new_image = comment.get("image")
+    if image is not None:
+        # Nothing is written yet: end the lookup transaction so the image is stored without a pooled connection.
+        await connection.release()
+        new_image = await process_image_input(image, subdir="comments")
 
     if not new_text and not new_image:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Either text or image must be provided")
@@ -66,4 +81,6 @@ async def update_comment(
         text=new_text,
         image=new_image,
     )
+    if updated is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
     return updated
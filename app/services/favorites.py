@@ -2,17 +2,27 @@ from __future__ import annotations
 
 from fastapi import HTTPException, status
 
+from app.loaders import get_loaders
 from app.repositories import favorites as favorites_repo
-from app.repositories import recipes as recipes_repo
 from app.repositories.utils import row_affected
+from app.services.pagination import decode_cursor, next_cursor
 
 
-async def list_favorites(connection, user_id: int, q: str | None, limit: int, offset: int) -> list[dict]:
-    return await favorites_repo.list_favorites(connection, user_id, q=q, limit=limit, offset=offset)
+async def list_favorites(
+    connection,
+    user_id: int,
+    q: str | None,
+    limit: int,
+    offset: int,
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    after = decode_cursor(cursor, favorites_repo.CURSOR_KEYS)
+    favorites = await favorites_repo.list_favorites(connection, user_id, q=q, limit=limit, offset=offset, after=after)
+    return favorites, next_cursor(favorites, limit, favorites_repo.CURSOR_KEYS)
 
 
 async def add_favorite(connection, *, user_id: int, recipe_id: int) -> dict:
-    recipe = await recipes_repo.get_by_id(connection, recipe_id)
+    recipe = await get_loaders(connection).recipes.load(recipe_id)
     if not recipe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     existing = await favorites_repo.get_user_favorite(connection, user_id, recipe_id)
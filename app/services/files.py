@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import base64
+import binascii
+import hashlib
 import os
+import tempfile
 from pathlib import Path
-from typing import Tuple
-from uuid import uuid4
+from typing import BinaryIO, Tuple
 
 from fastapi import HTTPException, UploadFile, status
 
+from app.services.images import DERIVATIVE_SUBDIRS, derivative_worker
+
 MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", "media"))
 ALLOWED_CONTENT_TYPES: dict[str, str] = {
     "image/jpeg": ".jpg",
@@ -15,48 +20,113 @@ ALLOWED_CONTENT_TYPES: dict[str, str] = {
     "image/webp": ".webp",
 }
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 
 def _ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
-async def save_image(file: UploadFile, subdir: str) -> str:
-    if file.content_type not in ALLOWED_CONTENT_TYPES:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Unsupported file type. Allowed: jpeg, png, webp",
-        )
+def media_path(subdir: str, digest: str, ext: str) -> str:
+    """
+    Content-addressed location of a blob, relative to MEDIA_ROOT. Two levels of
+    shards (``ab/cd/``) keep every directory small.
+    """
+    return f"{subdir}/{digest[:2]}/{digest[2:4]}/{digest}{ext}"
 
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File too large. Max size is 5MB",
-        )
 
-    ext = ALLOWED_CONTENT_TYPES[file.content_type]
-    return _write_bytes(content, ext, subdir)
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail="File too large. Max size is 5MB",
+    )
+
 
+def _unsupported_type() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Unsupported file type. Allowed: jpeg, png, webp",
+    )
 
-def save_base64_image(data: str, subdir: str) -> str:
+
+def _sniff_extension(head: bytes) -> str | None:
+    """Pick the extension from the file's magic bytes rather than what the client claims."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+async def save_image(file: UploadFile, subdir: str) -> str:
+    """
+    Stream an upload to disk in chunks, rejecting it as soon as it passes
+    MAX_FILE_SIZE. File work runs in threads so the event loop keeps serving.
+    Identical content is stored once.
+    """
+    if file.content_type not in ALLOWED_CONTENT_TYPES:
+        raise _unsupported_type()
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise _too_large()
+
+    target_dir = MEDIA_ROOT / subdir
+    await asyncio.to_thread(_ensure_dir, target_dir)
+    fd, tmp_name = await asyncio.to_thread(tempfile.mkstemp, dir=target_dir, suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    try:
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as fh:
+            ext = await _copy_upload(file, fh, digest)
+        url = await asyncio.to_thread(_commit_file, tmp_path, media_path(subdir, digest.hexdigest(), ext))
+    except BaseException:
+        await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+        raise
+    _queue_derivatives(url, subdir)
+    return url
+
+
+async def _copy_upload(file: UploadFile, fh: BinaryIO, digest) -> str:
+    ext = None
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if ext is None:
+            ext = _sniff_extension(chunk)
+            if ext is None:
+                raise _unsupported_type()
+        size += len(chunk)
+        if size > MAX_FILE_SIZE:
+            raise _too_large()
+        digest.update(chunk)
+        await asyncio.to_thread(fh.write, chunk)
+    if ext is None:
+        raise _unsupported_type()
+    return ext
+
+
+async def save_base64_image(data: str, subdir: str) -> str:
     """
     Accept base64 string with optional data URL prefix and save to media.
     """
+    _, raw_b64 = _split_data_url(data)
+    # Four base64 characters carry three bytes; refuse oversized payloads before decoding them.
+    if len(raw_b64) * 3 // 4 > MAX_FILE_SIZE + 3:
+        raise _too_large()
     try:
-        mime, raw_b64 = _split_data_url(data)
-        ext = ALLOWED_CONTENT_TYPES.get(mime, ".png") if mime else ".png"
-        content = base64.b64decode(raw_b64)
-    except Exception:
+        content = await asyncio.to_thread(base64.b64decode, raw_b64)
+    except (binascii.Error, ValueError):
         raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid base64 image")
 
     if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="File too large. Max size is 5MB",
-        )
+        raise _too_large()
+    ext = _sniff_extension(content[:16])
+    if ext is None:
+        raise _unsupported_type()
 
-    return _write_bytes(content, ext, subdir)
+    url = await asyncio.to_thread(_write_bytes, content, ext, subdir)
+    _queue_derivatives(url, subdir)
+    return url
 
 
 def _split_data_url(data: str) -> Tuple[str | None, str]:
@@ -68,15 +138,53 @@ def _split_data_url(data: str) -> Tuple[str | None, str]:
 
 
 def _write_bytes(content: bytes, ext: str, subdir: str) -> str:
+    relative = media_path(subdir, hashlib.sha256(content).hexdigest(), ext)
+    if _reuse_existing(MEDIA_ROOT / relative):
+        return f"/media/{relative}"
     target_dir = MEDIA_ROOT / subdir
     _ensure_dir(target_dir)
-    filename = f"{uuid4().hex}{ext}"
-    target_path = target_dir / filename
-    target_path.write_bytes(content)
-    return f"/media/{subdir}/{filename}"
+    fd, tmp_name = tempfile.mkstemp(dir=target_dir, suffix=".tmp")
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(content)
+        return _commit_file(tmp_path, relative)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _reuse_existing(path: Path) -> bool:
+    """
+    True if the blob is already stored. Its mtime is refreshed so media_gc's
+    grace period covers the row about to reference it.
+    """
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _commit_file(tmp_path: Path, relative: str) -> str:
+    """Move a fully written temp file into place; readers never see a partial file."""
+    target = MEDIA_ROOT / relative
+    if _reuse_existing(target):
+        tmp_path.unlink()
+    else:
+        _ensure_dir(target.parent)
+        # mkstemp creates 0600 files; media is served to everyone.
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    return f"/media/{relative}"
+
+
+def _queue_derivatives(url: str, subdir: str) -> None:
+    if subdir in DERIVATIVE_SUBDIRS:
+        derivative_worker.enqueue(MEDIA_ROOT / url.removeprefix("/media/"))
 
 
-def process_image_input(image_value: str | None, subdir: str) -> str | None:
+async def process_image_input(image_value: str | None, subdir: str) -> str | None:
     """
     Accepts either an existing URL/path or base64 string. Returns stored media URL.
     """
@@ -85,4 +193,4 @@ def process_image_input(image_value: str | None, subdir: str) -> str | None:
     image_value = image_value.strip()
     if image_value.startswith("/media/") or image_value.startswith("http"):
         return image_value
-    return save_base64_image(image_value, subdir=subdir)
+    return await save_base64_image(image_value, subdir=subdir)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_QUEUE_SIZE = int(os.getenv("IMAGE_QUEUE_SIZE", "1000"))
+IMAGE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+
+# Variant name -> maximum width in pixels. Derivatives sit next to the original
+# as ``<stem>.<variant>.webp``.
+IMAGE_VARIANTS: dict[str, int] = {
+    "thumb": 320,
+    "card": 640,
+}
+# Media subdirectories whose images get derivatives.
+DERIVATIVE_SUBDIRS = ("recipes", "avatars")
+
+logger = logging.getLogger(__name__)
+
+
+def image_variants(url: str | None) -> dict[str, str] | None:
+    """
+    URLs of the derivatives of a stored image, or None outside
+    DERIVATIVE_SUBDIRS. They are computed from the name alone, so a variant may
+    not exist yet right after an upload; clients fall back to the original.
+    """
+    if not url or not url.startswith("/media/"):
+        return None
+    if url.removeprefix("/media/").split("/", 1)[0] not in DERIVATIVE_SUBDIRS:
+        return None
+    base, dot, _ = url.rpartition(".")
+    if not dot or "/" in url[len(base):]:
+        return None
+    return {name: f"{base}.{name}.webp" for name in IMAGE_VARIANTS}
+
+
+def is_derivative(path: Path) -> bool:
+    parts = path.name.split(".")
+    return len(parts) == 3 and parts[1] in IMAGE_VARIANTS and parts[2] == "webp"
+
+
+def render_variants(source: str, force: bool = False) -> int:
+    """
+    Write the missing derivatives of ``source``; returns how many were written.
+    Runs in a worker process.
+    """
+    # Imported here so only the worker processes load Pillow.
+    from PIL import Image, ImageOps
+
+    source_path = Path(source)
+    targets = {
+        name: source_path.with_name(f"{source_path.stem}.{name}.webp")
+        for name in IMAGE_VARIANTS
+    }
+    if not force and all(target.exists() for target in targets.values()):
+        return 0
+
+    written = 0
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        for name, width in IMAGE_VARIANTS.items():
+            target = targets[name]
+            if target.exists() and not force:
+                continue
+            variant = image.copy()
+            # Bounded by width only; thumbnail() keeps the aspect ratio and never upscales.
+            variant.thumbnail((width, image.height))
+            fd, tmp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    variant.save(fh, "WEBP", quality=IMAGE_WEBP_QUALITY)
+                os.chmod(tmp_name, 0o644)
+                os.replace(tmp_name, target)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+            written += 1
+    return written
+
+
+class DerivativeWorker:
+    """
+    Generate image derivatives off the request path: saved images are queued
+    and rendered in a process pool, so resizing never touches the event loop.
+    A full queue drops the job; the backfill tool catches up later.
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self.workers = max(workers, 1)
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: list[asyncio.Task] = []
+
+    def enqueue(self, path: Path) -> None:
+        if not self._tasks:
+            return
+        try:
+            self._queue.put_nowait(str(path))
+        except asyncio.QueueFull:
+            logger.warning("Image derivative queue full, skipping %s", path)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._executor = self._new_executor()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that runs an event loop and DB pool is unsafe.
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            source = await self._queue.get()
+            executor = self._executor
+            try:
+                await loop.run_in_executor(executor, render_variants, source)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); later jobs need a fresh pool.
+                logger.exception("Image worker crashed on %s", source)
+                if self._executor is executor:
+                    self._executor = self._new_executor()
+                    executor.shutdown(wait=False, cancel_futures=True)
+            except Exception:
+                logger.exception("Failed to render derivatives for %s", source)
+            finally:
+                self._queue.task_done()
+
+
+derivative_worker = DerivativeWorker(IMAGE_WORKERS, IMAGE_QUEUE_SIZE)
@@ -1,15 +1,36 @@
 from __future__ import annotations
 
+from fastapi import HTTPException, status
+
+from app.core.etag import check_not_modified, make_etag
 from app.repositories import ingredients as ingredients_repo
 from app.repositories import recipe_ingredients as ri_repo
+from app.repositories.utils import SEARCH_FUZZY
+from app.services.catalog import ingredient_catalog
 
 
-async def list_ingredients(connection, q: str | None, limit: int, offset: int, sort: str | None = None) -> list[dict]:
-    return await ingredients_repo.list_ingredients(connection, q=q, limit=limit, offset=offset, sort=sort)
+async def list_ingredients(
+    connection,
+    q: str | None,
+    limit: int,
+    offset: int,
+    sort: str | None = None,
+    search: str | None = None,
+    if_none_match: str | None = None,
+) -> tuple[list[dict], str | None]:
+    if search not in (None, SEARCH_FUZZY):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported search mode")
+    etag = None
+    # sort=popular follows recipe usage, which the catalog version does not track.
+    if sort != "popular":
+        etag = make_etag("ingredients", await ingredients_repo.get_version(connection))
+        check_not_modified(if_none_match, etag)
+    items = await ingredients_repo.list_ingredients(connection, q=q, limit=limit, offset=offset, sort=sort, search=search)
+    return items, etag
 
 
 async def get_ingredient_stats(connection, ingredient_id: int) -> dict:
-    ingredient = await ingredients_repo.get_by_id(connection, ingredient_id)
+    ingredient = await ingredient_catalog.get(connection, ingredient_id)
     if not ingredient:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingredient not found")
     uses = await ri_repo.count_recipes_for_ingredient(connection, ingredient_id)
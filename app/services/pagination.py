@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Sequence
+
+from fastapi import HTTPException, status
+
+# Sort keys that are not timestamps or ids; their values may be int or float.
+NUMERIC_KEYS = frozenset({"rank", "popularity_score"})
+MAX_ID = 2**31 - 1  # ids are SERIAL
+
+
+def encode_cursor(row: dict, keys: Sequence[str]) -> str:
+    values = [{"dt": row[key].isoformat()} if isinstance(row[key], datetime) else row[key] for key in keys]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None, keys: Sequence[str]) -> list[Any] | None:
+    """Turn an opaque cursor back into sort key values; 400 if it is malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor does not match sort order")
+        return [_cursor_value(key, value) for key, value in zip(keys, values)]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _cursor_value(key: str, value: Any) -> Any:
+    """Check a decoded value against its sort key, so a forged cursor never reaches the query."""
+    if isinstance(value, dict):
+        if key == "id" or key in NUMERIC_KEYS:
+            raise ValueError(f"{key} is not a timestamp")
+        return datetime.fromisoformat(value["dt"])
+    if isinstance(value, bool):
+        raise ValueError(f"{key} must be a number")
+    if key == "id":
+        if not isinstance(value, int) or not 0 < value <= MAX_ID:
+            raise ValueError("id must be a positive integer")
+        return value
+    if key in NUMERIC_KEYS and isinstance(value, (int, float)):
+        return value
+    raise ValueError(f"unexpected value for {key}")
+
+
+def next_cursor(rows: list[dict], limit: int, keys: Sequence[str]) -> str | None:
+    if limit <= 0 or len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1], keys)
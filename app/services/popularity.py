@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from app import db
+from app.repositories import recipes as recipes_repo
+
+POPULARITY_REFRESH_INTERVAL = float(os.getenv("POPULARITY_REFRESH_INTERVAL", "300"))
+POPULARITY_BATCH_SIZE = int(os.getenv("POPULARITY_BATCH_SIZE", "2000"))
+POPULARITY_VIEWS_WEIGHT = float(os.getenv("POPULARITY_VIEWS_WEIGHT", "1"))
+POPULARITY_FAVORITES_WEIGHT = float(os.getenv("POPULARITY_FAVORITES_WEIGHT", "20"))
+POPULARITY_RATINGS_WEIGHT = float(os.getenv("POPULARITY_RATINGS_WEIGHT", "5"))
+POPULARITY_GRAVITY = float(os.getenv("POPULARITY_GRAVITY", "1.5"))
+
+# Any constant works; it only has to be the same in every worker.
+POPULARITY_LOCK_KEY = 0x706F70
+
+logger = logging.getLogger(__name__)
+
+
+class PopularityRefresher:
+    """
+    Periodically recompute recipes.popularity_score in id-ordered batches.
+    Each batch is its own statement, so row locks are short; an advisory
+    lock keeps several workers from doing the same pass at once.
+    """
+
+    def __init__(self, interval: float, batch_size: int) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self) -> int:
+        """Run one full pass; returns the number of batches, 0 if another worker holds the lock."""
+        if db.pool is None:
+            return 0
+        weights = (POPULARITY_VIEWS_WEIGHT, POPULARITY_FAVORITES_WEIGHT, POPULARITY_RATINGS_WEIGHT)
+        async with db.pool.acquire() as connection:
+            if not await connection.fetchval("SELECT pg_try_advisory_lock($1)", POPULARITY_LOCK_KEY):
+                return 0
+            try:
+                batches = 0
+                last_id: Optional[int] = 0
+                while last_id is not None:
+                    last_id = await recipes_repo.refresh_popularity(
+                        connection, last_id, self.batch_size, weights, POPULARITY_GRAVITY
+                    )
+                    batches += 1
+                return batches
+            finally:
+                await connection.execute("SELECT pg_advisory_unlock($1)", POPULARITY_LOCK_KEY)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Failed to refresh popularity scores")
+            await asyncio.sleep(self.interval)
+
+
+popularity_refresher = PopularityRefresher(POPULARITY_REFRESH_INTERVAL, POPULARITY_BATCH_SIZE)
@@ -2,12 +2,21 @@ from __future__ import annotations
 
 from fastapi import HTTPException
 
+from app.loaders import get_loaders
 from app.repositories import ratings as ratings_repo
-from app.repositories import recipes as recipes_repo
+from app.services.pagination import decode_cursor, next_cursor
 
 
-async def list_ratings(connection, recipe_id: int | None, limit: int, offset: int) -> list[dict]:
-    return await ratings_repo.list_ratings(connection, recipe_id, limit=limit, offset=offset)
+async def list_ratings(
+    connection,
+    recipe_id: int | None,
+    limit: int,
+    offset: int,
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    after = decode_cursor(cursor, ratings_repo.CURSOR_KEYS)
+    ratings = await ratings_repo.list_ratings(connection, recipe_id, limit=limit, offset=offset, after=after)
+    return ratings, next_cursor(ratings, limit, ratings_repo.CURSOR_KEYS)
 
 
 async def get_avg_rate(connection, recipe_id: int) -> float:
@@ -15,7 +24,7 @@ async def get_avg_rate(connection, recipe_id: int) -> float:
 
 
 async def create_rating(connection, *, user_id: int, recipe_id: int, rate: int) -> dict:
-    recipe = await recipes_repo.get_by_id(connection, recipe_id)
+    recipe = await get_loaders(connection).recipes.load(recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-from fastapi import HTTPException
+import asyncpg
+from fastapi import HTTPException, status
 
-from app.repositories import ingredients as ingredients_repo
+from app.core.response_cache import invalidate_on_commit
+from app.loaders import get_loaders
 from app.repositories import recipe_ingredients as ri_repo
-from app.repositories import recipes as recipes_repo
 from app.repositories.utils import row_affected
+from app.services.catalog import ingredient_catalog
 
 
 async def list_items(connection, recipe_id: int | None = None) -> list[dict]:
@@ -13,17 +15,24 @@ async def list_items(connection, recipe_id: int | None = None) -> list[dict]:
 
 
 async def upsert_item(connection, *, user_id: int, recipe_id: int, ingredient_id: int, amount: int) -> dict:
-    recipe = await recipes_repo.get_by_id(connection, recipe_id)
+    recipe = await get_loaders(connection).recipes.load(recipe_id)
     if not recipe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     if recipe["author_id"] != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only author can change ingredients")
 
-    ingredient = await ingredients_repo.get_by_id(connection, ingredient_id)
+    ingredient = await ingredient_catalog.get(connection, ingredient_id)
     if not ingredient:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingredient not found")
 
-    return await ri_repo.upsert_item(connection, recipe_id, ingredient_id, amount)
+    try:
+        item = await ri_repo.upsert_item(connection, recipe_id, ingredient_id, amount)
+    except asyncpg.ForeignKeyViolationError:
+        # The catalog still had an ingredient that was deleted since.
+        ingredient_catalog.discard(ingredient_id)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingredient not found")
+    invalidate_on_commit(connection, "recipes")
+    return item
 
 
 async def delete_item(connection, *, user_id: int, item_id: int) -> None:
@@ -36,3 +45,4 @@ async def delete_item(connection, *, user_id: int, item_id: int) -> None:
     result = await ri_repo.delete_item(connection, item_id)
     if not row_affected(result):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe ingredient not found")
+    invalidate_on_commit(connection, "recipes")
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import asyncpg
 from fastapi import HTTPException, status
 
+from app.core.response_cache import invalidate_on_commit
+from app.loaders import get_loaders
 from app.repositories import recipe_tags as rt_repo
-from app.repositories import recipes as recipes_repo
-from app.repositories import tags as tags_repo
 from app.repositories.utils import row_affected
+from app.services.catalog import tag_catalog
 
 
 async def list_items(connection, recipe_id: int | None = None) -> list[dict]:
@@ -13,17 +15,24 @@ async def list_items(connection, recipe_id: int | None = None) -> list[dict]:
 
 
 async def upsert_item(connection, *, user_id: int, recipe_id: int, tag_id: int) -> dict:
-    recipe = await recipes_repo.get_by_id(connection, recipe_id)
+    recipe = await get_loaders(connection).recipes.load(recipe_id)
     if not recipe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     if recipe["author_id"] != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only author can change tags")
 
-    tag = await tags_repo.get_by_id(connection, tag_id)
+    tag = await tag_catalog.get(connection, tag_id)
     if not tag:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
 
-    return await rt_repo.upsert_item(connection, recipe_id, tag_id)
+    try:
+        item = await rt_repo.upsert_item(connection, recipe_id, tag_id)
+    except asyncpg.ForeignKeyViolationError:
+        # The catalog still had a tag another worker deleted.
+        tag_catalog.discard(tag_id)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
+    invalidate_on_commit(connection, "recipes")
+    return item
 
 
 async def delete_item(connection, *, user_id: int, item_id: int) -> None:
@@ -36,3 +45,4 @@ async def delete_item(connection, *, user_id: int, item_id: int) -> None:
     result = await rt_repo.delete_item(connection, item_id)
     if not row_affected(result):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe tag not found")
+    invalidate_on_commit(connection, "recipes")
@@ -1,55 +1,123 @@
 from __future__ import annotations
 
+import os
+from typing import AsyncIterator, Callable
+
+import asyncpg
 from fastapi import HTTPException, status
 
-from app.repositories import ingredients as ingredients_repo
+from app import db
+from app.core.etag import check_not_modified, make_etag
+from app.core.response_cache import invalidate_on_commit
+from app.loaders import get_loaders
+from app.repositories import favorites as favorites_repo
 from app.repositories import recipe_ingredients as ri_repo
 from app.repositories import recipe_tags as rt_repo
 from app.repositories import recipes as recipes_repo
 from app.repositories import tags as tags_repo
-from app.repositories import favorites as favorites_repo
-from app.repositories import comments as comments_repo
-from app.repositories import ratings as ratings_repo
+from app.repositories import recipe_stats as recipe_stats_repo
 from app.repositories.utils import row_affected
+from app.schemas import Recipe
+from app.services.catalog import ingredient_catalog, tag_catalog
 from app.services.files import process_image_input
+from app.services.images import image_variants
+from app.services.pagination import decode_cursor, next_cursor
+from app.services.views import view_counter
 
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "500"))
 
-async def list_recipes(connection, q: str | None, limit: int, offset: int, sort: str | None = None) -> list[dict]:
-    recipes = await recipes_repo.list_recipes(connection, q=q, limit=limit, offset=offset, sort=sort)
-    enriched = []
-    for recipe in recipes:
-        enriched.append(await _attach_details(connection, recipe))
-    return enriched
 
+async def list_recipes(
+    connection,
+    q: str | None,
+    limit: int,
+    offset: int,
+    sort: str | None = None,
+    cursor: str | None = None,
+    search: str | None = None,
+) -> tuple[list[dict], str | None]:
+    if search not in (None, recipes_repo.SEARCH_FTS):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported search mode")
+    if not q:
+        search = None
+    keys = recipes_repo.cursor_keys(sort, search)
+    after = decode_cursor(cursor, keys)
+    recipes = await recipes_repo.list_recipes(
+        connection, q=q, limit=limit, offset=offset, sort=sort, after=after, search=search
+    )
+    return await _attach_details_bulk(connection, recipes), next_cursor(recipes, limit, keys)
+
+
+async def list_user_recipes(
+    connection,
+    user_id: int,
+    q: str | None,
+    limit: int,
+    offset: int,
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    keys = recipes_repo.USER_RECIPES_CURSOR_KEYS
+    after = decode_cursor(cursor, keys)
+    recipes = await recipes_repo.list_user_recipes(connection, user_id, q=q, limit=limit, offset=offset, after=after)
+    return await _attach_details_bulk(connection, recipes), next_cursor(recipes, limit, keys)
+
+
+async def list_feed(
+    connection,
+    user_id: int,
+    limit: int,
+    offset: int,
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    keys = recipes_repo.USER_RECIPES_CURSOR_KEYS
+    after = decode_cursor(cursor, keys)
+    recipes = await recipes_repo.list_feed(connection, user_id, limit=limit, offset=offset, after=after)
+    return await _attach_details_bulk(connection, recipes), next_cursor(recipes, limit, keys)
+
+
+def export_user_recipes(user_id: int) -> AsyncIterator[str]:
+    return _export_ndjson(lambda conn: recipes_repo.iter_user_recipes(conn, user_id, EXPORT_CHUNK_SIZE))
+
+
+def export_favorite_recipes(user_id: int) -> AsyncIterator[str]:
+    return _export_ndjson(lambda conn: favorites_repo.iter_favorite_recipes(conn, user_id, EXPORT_CHUNK_SIZE))
 
-async def list_user_recipes(connection, user_id: int, q: str | None, limit: int, offset: int) -> list[dict]:
-    recipes = await recipes_repo.list_user_recipes(connection, user_id, q=q, limit=limit, offset=offset)
-    enriched = []
-    for recipe in recipes:
-        enriched.append(await _attach_details(connection, recipe))
-    return enriched
 
+async def _export_ndjson(open_chunks: Callable[..., AsyncIterator[list[dict]]]) -> AsyncIterator[str]:
+    """
+    Yield one JSON recipe per line. The body is produced after the request
+    handler returns, so it holds its own pool connection for the whole
+    stream; one snapshot keeps the export consistent.
+    """
+    async with db.pool.acquire() as conn:
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            async for chunk in open_chunks(conn):
+                recipes = await _attach_details_bulk(conn, chunk)
+                yield "".join(Recipe.model_validate(recipe).model_dump_json() + "\n" for recipe in recipes)
 
-async def get_recipe_or_404(connection, recipe_id: int) -> dict:
-    recipe = await recipes_repo.get_by_id(connection, recipe_id)
+
+async def get_recipe_or_404(connection, recipe_id: int, if_none_match: str | None = None) -> tuple[dict, str]:
+    """Return the hydrated recipe and its ETag; answers 304 before hydration when the client copy is current."""
+    recipe = await get_loaders(connection).recipes.load(recipe_id)
     if not recipe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
-    await recipes_repo.increment_views(connection, recipe_id)
-    recipe["views"] = (recipe.get("views") or 0) + 1
-    return await _attach_details(connection, recipe)
+    view_counter.record(recipe_id)
+    # Tag names are rendered into the body, so a tag rename has to change the tag too.
+    etag = make_etag("recipe", recipe_id, recipe["version"], await tags_repo.get_version(connection))
+    check_not_modified(if_none_match, etag)
+    recipe["views"] = (recipe.get("views") or 0) + view_counter.pending(recipe_id)
+    return await _attach_details(connection, recipe), etag
 
 
 async def get_recipe_stats(connection, recipe_id: int) -> dict:
-    recipe = await recipes_repo.get_by_id(connection, recipe_id)
-    if not recipe:
+    stats = await recipe_stats_repo.get_for_recipe(connection, recipe_id)
+    if not stats:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
-    likes = await favorites_repo.count_for_recipe(connection, recipe_id)
-    comments = await comments_repo.count_for_recipe(connection, recipe_id)
-    avg_rate = await ratings_repo.get_avg_rate(connection, recipe_id)
+    avg_rate = stats["rating_sum"] / stats["rating_count"] if stats["rating_count"] else 0.0
     return {
-        "likes": likes,
-        "views": recipe.get("views", 0),
-        "comments": comments,
+        "likes": stats["likes_count"],
+        "views": stats["views"] + view_counter.pending(recipe_id),
+        "comments": stats["comments_count"],
         "avg_rate": round(avg_rate, 2),
     }
 
@@ -65,7 +133,7 @@ async def create_recipe(
     tags: list[str],
     ingredients: list[dict],
 ) -> dict:
-    image_url = process_image_input(image, subdir="recipes")
+    image_url = await process_image_input(image, subdir="recipes")
     recipe = await recipes_repo.create_recipe(
         connection,
         author_id=author_id,
@@ -76,6 +144,7 @@ async def create_recipe(
     )
     await _sync_recipe_tags(connection, recipe["id"], tags)
     await _sync_recipe_ingredients(connection, recipe["id"], author_id, ingredients)
+    invalidate_on_commit(connection, "recipes", "tags")
     return await _attach_details(connection, recipe)
 
 
@@ -91,7 +160,7 @@ async def update_recipe(
     tags: list[str] | None,
     ingredients: list[dict] | None,
 ) -> dict:
-    recipe = await recipes_repo.get_by_id(connection, recipe_id)
+    recipe = await get_loaders(connection).recipes.load(recipe_id)
     if not recipe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     if recipe["author_id"] != author_id:
@@ -100,11 +169,16 @@ async def update_recipe(
     new_name = name if name is not None else recipe["name"]
     new_text = text if text is not None else recipe["text"]
     new_cooking_time = cooking_time if cooking_time is not None else recipe["cooking_time"]
-    new_image = process_image_input(image, subdir="recipes") if image is not None else recipe["image"]
-
     if new_cooking_time is None or new_cooking_time <= 0:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cooking_time")
 
+    new_image = recipe["image"]
+    if image is not None:
+        # Nothing is written yet: end the lookup transaction so the image is stored without a pooled connection.
+        await connection.release()
+        new_image = await process_image_input(image, subdir="recipes")
+
+    get_loaders(connection).recipes.clear(recipe_id)
     updated = await recipes_repo.update_recipe(
         connection,
         recipe_id=recipe_id,
@@ -113,22 +187,28 @@ async def update_recipe(
         text=new_text,
         cooking_time=new_cooking_time,
     )
+    if updated is None:
+        # Deleted while the image was being stored.
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     if tags is not None:
         await _sync_recipe_tags(connection, recipe_id, tags)
     if ingredients is not None:
         await _sync_recipe_ingredients(connection, recipe_id, author_id, ingredients)
+    invalidate_on_commit(connection, "recipes", "tags")
     return await _attach_details(connection, updated)
 
 
 async def delete_recipe(connection, *, recipe_id: int, author_id: int) -> None:
-    recipe = await recipes_repo.get_by_id(connection, recipe_id)
+    recipe = await get_loaders(connection).recipes.load(recipe_id)
     if not recipe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     if recipe["author_id"] != author_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the author can delete this recipe")
+    get_loaders(connection).recipes.clear(recipe_id)
     result = await recipes_repo.delete_recipe(connection, recipe_id)
     if not row_affected(result):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+    invalidate_on_commit(connection, "recipes")
 
 
 async def _sync_recipe_tags(connection, recipe_id: int, tags: list[str]) -> None:
@@ -138,23 +218,17 @@ async def _sync_recipe_tags(connection, recipe_id: int, tags: list[str]) -> None
         if normalized_name:
             normalized.append(normalized_name)
 
-    unique_tags = list(set(normalized))
+    unique_tags = list(dict.fromkeys(normalized))
 
-    await rt_repo.delete_all_for_recipe(connection, recipe_id)
-
-    for tag_name in unique_tags:
-        existing = await tags_repo.get_by_name(connection, tag_name)
-        if existing:
-            tag_id = existing["id"]
-        else:
-            created = await tags_repo.create_tag(connection, tag_name)
-            tag_id = created["id"]
-        await rt_repo.upsert_item(connection, recipe_id, tag_id)
+    rows = await tags_repo.ensure_tags(connection, unique_tags) if unique_tags else []
+    if len(rows) < len(unique_tags):
+        # A concurrent insert of the same name committed after our snapshot; re-read with a fresh one.
+        rows = await tags_repo.get_by_names(connection, unique_tags)
+    await rt_repo.sync_for_recipe(connection, recipe_id, [row["id"] for row in rows])
 
 
 async def _sync_recipe_ingredients(connection, recipe_id: int, author_id: int, ingredients: list[dict]) -> None:
-    await ri_repo.delete_all_for_recipe(connection, recipe_id)
-
+    amounts: dict[int, int] = {}
     for item in ingredients or []:
         if hasattr(item, "ingredient_id"):
             ingredient_id = getattr(item, "ingredient_id")
@@ -169,28 +243,56 @@ async def _sync_recipe_ingredients(connection, recipe_id: int, author_id: int, i
             raise HTTPException(status_code=400, detail="ingredient_id and amount are required for ingredients")
         if not (1 <= int(amount) <= 32000):
             raise HTTPException(status_code=400, detail="amount must be between 1 and 32000")
-
-        ingredient = await ingredients_repo.get_by_id(connection, ingredient_id)
-        if not ingredient:
-            raise HTTPException(status_code=404, detail=f"Ingredient {ingredient_id} not found")
-
-        await ri_repo.upsert_item(connection, recipe_id, ingredient_id, int(amount))
+        # Repeated ids keep the last amount, as the per-row upsert used to.
+        amounts[int(ingredient_id)] = int(amount)
+
+    found = await ingredient_catalog.get_many(connection, amounts)
+    missing = [ingredient_id for ingredient_id in amounts if ingredient_id not in found]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Ingredients not found: {', '.join(str(ingredient_id) for ingredient_id in missing)}",
+        )
+
+    try:
+        await ri_repo.sync_for_recipe(connection, recipe_id, list(amounts), list(amounts.values()))
+    except asyncpg.ForeignKeyViolationError:
+        # A cached ingredient was deleted since; drop the entries so the next attempt re-reads them.
+        for ingredient_id in amounts:
+            ingredient_catalog.discard(ingredient_id)
+        raise HTTPException(status_code=404, detail="Ingredients not found")
 
 
 async def _attach_details(connection, recipe: dict) -> dict:
-    recipe_id = recipe["id"]
-
-    tag_links = await rt_repo.list_items(connection, recipe_id)
-    tag_names: list[str] = []
-    for link in tag_links:
-        tag = await tags_repo.get_by_id(connection, link["tag_id"])
+    enriched = await _attach_details_bulk(connection, [recipe])
+    return enriched[0]
+
+
+async def _attach_details_bulk(connection, recipes: list[dict]) -> list[dict]:
+    """
+    Hydrate tags and ingredients for a page of recipes with two link queries;
+    tag names come from the catalog cache.
+    """
+    if not recipes:
+        return recipes
+    recipe_ids = [recipe["id"] for recipe in recipes]
+
+    links = await rt_repo.list_for_recipes(connection, recipe_ids)
+    tags = await tag_catalog.get_many(connection, [link["tag_id"] for link in links])
+    tags_by_recipe: dict[int, list[str]] = {recipe_id: [] for recipe_id in recipe_ids}
+    for link in links:
+        tag = tags.get(link["tag_id"])
         if tag:
-            tag_names.append(tag["name"])
-    recipe["tags"] = tag_names
-
-    ing_links = await ri_repo.list_items(connection, recipe_id)
-    recipe["ingredients"] = [
-        {"ingredient_id": item["ingredient_id"], "amount": item["amount"]}
-        for item in ing_links
-    ]
-    return recipe
+            tags_by_recipe[link["recipe_id"]].append(tag["name"])
+
+    ingredients_by_recipe: dict[int, list[dict]] = {recipe_id: [] for recipe_id in recipe_ids}
+    for item in await ri_repo.list_for_recipes(connection, recipe_ids):
+        ingredients_by_recipe[item["recipe_id"]].append(
+            {"ingredient_id": item["ingredient_id"], "amount": item["amount"]}
+        )
+
+    for recipe in recipes:
+        recipe["tags"] = tags_by_recipe[recipe["id"]]
+        recipe["ingredients"] = ingredients_by_recipe[recipe["id"]]
+        recipe["image_variants"] = image_variants(recipe["image"])
+    return recipes
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from app.core.security import password_hasher
+from app.services.users import auth_user_cache
+
+
+def get_runtime_stats() -> dict:
+    """In-process counters; each worker reports its own."""
+    cache = auth_user_cache.cache
+    return {
+        "password_hasher": password_hasher.stats(),
+        "auth_user_cache": {"hits": cache.hits, "misses": cache.misses, "size": len(cache)},
+    }
@@ -1,18 +1,77 @@
 from __future__ import annotations
 
+import csv
+import io
+from typing import Iterator
+
 from fastapi import HTTPException, status
 
-from app.repositories import recipes as recipes_repo
+from app.loaders import get_loaders
 from app.repositories import shopping_list as shopping_list_repo
 from app.repositories.utils import row_affected
+from app.schemas import ShoppingListIngredient
+from app.services.pagination import decode_cursor, next_cursor
+
+
+async def list_items(
+    connection,
+    user_id: int,
+    q: str | None,
+    limit: int,
+    offset: int,
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    after = decode_cursor(cursor, shopping_list_repo.CURSOR_KEYS)
+    items = await shopping_list_repo.list_items(connection, user_id, q=q, limit=limit, offset=offset, after=after)
+    return items, next_cursor(items, limit, shopping_list_repo.CURSOR_KEYS)
+
+
+DOWNLOAD_FORMATS = {
+    "txt": "text/plain; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "json": "application/json",
+}
+
+
+async def get_download(connection, user_id: int, fmt: str) -> tuple[Iterator[str], str]:
+    """Return the user's summed ingredients rendered as ``fmt`` and its media type."""
+    if fmt not in DOWNLOAD_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported format")
+    items = await shopping_list_repo.list_ingredient_totals(connection, user_id)
+    # Rendering needs no database, so the pool connection goes back before streaming starts.
+    await connection.release()
+    render = {"txt": _render_txt, "csv": _render_csv, "json": _render_json}[fmt]
+    return render(items), DOWNLOAD_FORMATS[fmt]
+
+
+def _render_txt(items: list[dict]) -> Iterator[str]:
+    for item in items:
+        yield f"{item['name']} ({item['measurement_unit']}) — {item['amount']}\n"
+
+
+def _render_csv(items: list[dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["name", "measurement_unit", "amount"])
+    for item in items:
+        writer.writerow([item["name"], item["measurement_unit"], item["amount"]])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Only reached with an empty list, where the header is still pending.
+    if buffer.getvalue():
+        yield buffer.getvalue()
 
 
-async def list_items(connection, user_id: int, q: str | None, limit: int, offset: int) -> list[dict]:
-    return await shopping_list_repo.list_items(connection, user_id, q=q, limit=limit, offset=offset)
+def _render_json(items: list[dict]) -> Iterator[str]:
+    yield "["
+    for index, item in enumerate(items):
+        yield ("," if index else "") + ShoppingListIngredient(**item).model_dump_json()
+    yield "]"
 
 
 async def add_item(connection, *, user_id: int, recipe_id: int) -> dict:
-    recipe = await recipes_repo.get_by_id(connection, recipe_id)
+    recipe = await get_loaders(connection).recipes.load(recipe_id)
     if not recipe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
     existing = await shopping_list_repo.get_item(connection, user_id, recipe_id)
@@ -2,24 +2,48 @@ from __future__ import annotations
 
 from fastapi import HTTPException, status
 
+from app.loaders import get_loaders
 from app.repositories import subscriptions as subscriptions_repo
-from app.repositories import users as users_repo
 from app.repositories.utils import row_affected
+from app.services.images import image_variants
+from app.services.pagination import decode_cursor, next_cursor
 
 
-async def list_items(connection, user_id: int, q: str | None, limit: int, offset: int) -> list[dict]:
-    return await subscriptions_repo.list_subscriptions(connection, user_id, q=q, limit=limit, offset=offset)
+async def list_items(
+    connection,
+    user_id: int,
+    q: str | None,
+    limit: int,
+    offset: int,
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    after = decode_cursor(cursor, subscriptions_repo.CURSOR_KEYS)
+    subs = await subscriptions_repo.list_subscriptions(connection, user_id, q=q, limit=limit, offset=offset, after=after)
+    for user in subs:
+        user["avatar_variants"] = image_variants(user.get("avatar"))
+    return subs, next_cursor(subs, limit, subscriptions_repo.CURSOR_KEYS)
 
 
-async def list_followers(connection, user_id: int, q: str | None, limit: int, offset: int) -> list[dict]:
-    return await subscriptions_repo.list_followers(connection, user_id, q=q, limit=limit, offset=offset)
+async def list_followers(
+    connection,
+    user_id: int,
+    q: str | None,
+    limit: int,
+    offset: int,
+    cursor: str | None = None,
+) -> tuple[list[dict], str | None]:
+    after = decode_cursor(cursor, subscriptions_repo.CURSOR_KEYS)
+    followers = await subscriptions_repo.list_followers(connection, user_id, q=q, limit=limit, offset=offset, after=after)
+    for user in followers:
+        user["avatar_variants"] = image_variants(user.get("avatar"))
+    return followers, next_cursor(followers, limit, subscriptions_repo.CURSOR_KEYS)
 
 
 async def upsert_item(connection, *, user_id: int, following_id: int) -> dict:
     if user_id == following_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot subscribe to yourself")
 
-    target_user = await users_repo.get_by_id(connection, following_id)
+    target_user = await get_loaders(connection).users.load(following_id)
     if not target_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target user not found")
 
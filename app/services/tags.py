@@ -2,32 +2,51 @@ from __future__ import annotations
 
 from fastapi import HTTPException, status
 
+from app.core.etag import check_not_modified, make_etag
+from app.core.response_cache import invalidate_on_commit
 from app.repositories import tags as tags_repo
-from app.repositories.utils import row_affected
+from app.repositories.utils import SEARCH_FUZZY, row_affected
+from app.services.catalog import tag_catalog
 
 
-async def list_tags(connection, q: str | None, limit: int, offset: int) -> list[dict]:
-    return await tags_repo.list_tags(connection, q=q, limit=limit, offset=offset)
+async def list_tags(
+    connection,
+    q: str | None,
+    limit: int,
+    offset: int,
+    search: str | None = None,
+    if_none_match: str | None = None,
+) -> tuple[list[dict], str]:
+    if search not in (None, SEARCH_FUZZY):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported search mode")
+    # Query parameters are part of the URL the client caches under, so the catalog version is enough.
+    etag = make_etag("tags", await tags_repo.get_version(connection))
+    check_not_modified(if_none_match, etag)
+    return await tags_repo.list_tags(connection, q=q, limit=limit, offset=offset, search=search), etag
 
 
 async def create_tag(connection, name: str) -> dict:
-    existing = await tags_repo.get_by_name(connection, name)
+    existing = await tag_catalog.get_by_name(connection, name)
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tag with this name already exists")
+    invalidate_on_commit(connection, "tags")
     return await tags_repo.create_tag(connection, name)
 
 
 async def update_tag(connection, tag_id: int, name: str) -> dict:
-    tag = await tags_repo.get_by_id(connection, tag_id)
+    tag = await tag_catalog.get(connection, tag_id)
     if not tag:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
     if name != tag["name"]:
-        duplicate = await tags_repo.get_by_name(connection, name)
+        duplicate = await tag_catalog.get_by_name(connection, name)
         if duplicate:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Tag with this name already exists",
             )
+    tag_catalog.discard_on_commit(connection, tag_id, tag["name"])
+    # Tag names are rendered into recipe bodies as well.
+    invalidate_on_commit(connection, "tags", "recipes")
     return await tags_repo.update_tag(connection, tag_id, name)
 
 
@@ -35,10 +54,12 @@ async def delete_tag(connection, tag_id: int) -> None:
     result = await tags_repo.delete_tag(connection, tag_id)
     if not row_affected(result):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
+    tag_catalog.discard_on_commit(connection, tag_id)
+    invalidate_on_commit(connection, "tags", "recipes")
 
 
 async def get_tag_or_404(connection, tag_id: int) -> dict:
-    tag = await tags_repo.get_by_id(connection, tag_id)
+    tag = await tag_catalog.get(connection, tag_id)
     if not tag:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
-    return tag
+    return dict(tag)
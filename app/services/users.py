@@ -1,43 +1,95 @@
 from __future__ import annotations
 
+import os
+from typing import Optional
+
 from fastapi import HTTPException, status
 
+from app.core.cache import TTLCache
+from app.core.etag import check_not_modified, make_etag
+from app.core.response_cache import invalidate_on_commit
+from app.loaders import get_loaders
 from app.repositories import users as users_repo
-from app.repositories import favorites as favorites_repo
-from app.repositories import comments as comments_repo
-from app.repositories import subscriptions as subscriptions_repo
+from app.repositories import author_stats as author_stats_repo
+from app.repositories.utils import SEARCH_FUZZY
 from app.schemas import UserUpdate
 from app.services.files import process_image_input
+from app.services.images import image_variants
+
+
+AUTHOR_STATS_CACHE_TTL = float(os.getenv("AUTHOR_STATS_CACHE_TTL", "30"))
+AUTHOR_STATS_CACHE_SIZE = int(os.getenv("AUTHOR_STATS_CACHE_SIZE", "10000"))
+
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+
+
+class AuthUserCache:
+    """
+    Authenticated user rows (without password_hash) for get_current_user.
+    Writes in this worker invalidate on commit; other workers catch up within
+    the TTL. A row loaded while an invalidation happened is not stored, so a
+    read racing the write cannot put the old profile back.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generation = 0
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, user_id: int) -> Optional[dict]:
+        return self.cache.get(user_id)
+
+    def set(self, user_id: int, user: dict, generation: int) -> None:
+        if generation == self._generation:
+            self.cache.set(user_id, user)
+
+    def invalidate(self, user_id: int) -> None:
+        self._generation += 1
+        self.cache.pop(user_id)
+
+
+author_stats_cache = TTLCache(maxsize=AUTHOR_STATS_CACHE_SIZE, ttl=AUTHOR_STATS_CACHE_TTL)
+auth_user_cache = AuthUserCache(maxsize=AUTH_USER_CACHE_SIZE, ttl=AUTH_USER_CACHE_TTL)
 
 
 def _sanitize(user: dict) -> dict:
     user.pop("password_hash", None)
     user.pop("username", None)
+    user["avatar_variants"] = image_variants(user.get("avatar"))
     return user
 
 
 async def get_user_or_404(connection, user_id: int) -> dict:
-    user = await users_repo.get_by_id(connection, user_id)
+    user = await get_loaders(connection).users.load(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return _sanitize(user)
 
 
-async def list_users(connection, q: str | None, limit: int, offset: int) -> list[dict]:
-    users = await users_repo.list_users(connection, q=q, limit=limit, offset=offset)
+async def get_user_profile(connection, user_id: int, if_none_match: str | None = None) -> tuple[dict, str]:
+    user = await get_user_or_404(connection, user_id)
+    etag = make_etag("user", user_id, user["version"])
+    check_not_modified(if_none_match, etag)
+    return user, etag
+
+
+async def list_users(connection, q: str | None, limit: int, offset: int, search: str | None = None) -> list[dict]:
+    if search not in (None, SEARCH_FUZZY):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported search mode")
+    users = await users_repo.list_users(connection, q=q, limit=limit, offset=offset, search=search)
     return [_sanitize(u) for u in users]
 
 
-async def get_current_user_profile(current_user: dict) -> dict:
-    return _sanitize(dict(current_user))
+async def get_current_user_profile(current_user: dict, if_none_match: str | None = None) -> tuple[dict, str]:
+    etag = make_etag("user", current_user["id"], current_user["version"])
+    check_not_modified(if_none_match, etag)
+    return _sanitize(dict(current_user)), etag
 
 
 async def update_current_user(connection, user_id: int, payload: UserUpdate) -> dict:
-    if payload.email:
-        existing = await users_repo.get_by_email(connection, payload.email)
-        if existing and existing["id"] != user_id:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already in use")
-
     if (
         payload.email is None
         and payload.first_name is None
@@ -52,10 +104,17 @@ async def update_current_user(connection, user_id: int, payload: UserUpdate) ->
     avatar_input = payload.avatar
     delete_avatar = avatar_input == ""
     avatar_value = None
+    # Store the avatar before the first query so the transaction isn't held open during the write.
     if not delete_avatar and avatar_input not in (None, ""):
-        avatar_value = process_image_input(avatar_input, subdir="avatars")
+        avatar_value = await process_image_input(avatar_input, subdir="avatars")
     if delete_avatar:
         avatar_value = "__DELETE__"
+
+    if payload.email:
+        existing = await users_repo.get_by_email(connection, payload.email)
+        if existing and existing["id"] != user_id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already in use")
+    get_loaders(connection).users.clear(user_id)
     updated = await users_repo.update_user(
         connection,
         user_id=user_id,
@@ -64,18 +123,28 @@ async def update_current_user(connection, user_id: int, payload: UserUpdate) ->
         last_name=last_name,
         avatar=avatar_value,
     )
+    # /users/{id}/recipes embeds the author.
+    invalidate_on_commit(connection, "recipes")
+    connection.on_commit(lambda: _forget_auth_user(user_id))
     return _sanitize(updated)
 
 
+async def _forget_auth_user(user_id: int) -> None:
+    auth_user_cache.invalidate(user_id)
+
+
 async def get_user_stats(connection, user_id: int) -> dict:
-    user = await users_repo.get_by_id(connection, user_id)
-    if not user:
+    cached = author_stats_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+    stats = await author_stats_repo.get_for_user(connection, user_id)
+    if not stats:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    likes = await favorites_repo.count_for_author(connection, user_id)
-    subscribers = await subscriptions_repo.count_followers(connection, user_id)
-    comments = await comments_repo.count_for_author_recipes(connection, user_id)
-    return {
-        "likes": likes,
-        "subscribers": subscribers,
-        "comments": comments,
+    result = {
+        "likes": stats["likes_received"],
+        "subscribers": stats["subscribers_count"],
+        "comments": stats["comments_received"],
+        "recipes": stats["recipes_count"],
     }
+    author_stats_cache.set(user_id, result)
+    return dict(result)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import Counter
+from typing import Optional
+
+from app import db
+from app.repositories import recipes as recipes_repo
+
+VIEWS_FLUSH_INTERVAL = float(os.getenv("VIEWS_FLUSH_INTERVAL", "5"))
+VIEWS_MAX_PENDING = int(os.getenv("VIEWS_MAX_PENDING", "1000"))
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Aggregate recipe views in memory and write them periodically with one
+    batched UPDATE, so reading a recipe never writes to the database.
+    """
+
+    def __init__(self, interval: float, max_pending: int) -> None:
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: Counter[int] = Counter()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, recipe_id: int) -> None:
+        self._pending[recipe_id] += 1
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    def pending(self, recipe_id: int) -> int:
+        return self._pending.get(recipe_id, 0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # Let a flush in progress finish instead of cancelling it halfway through the UPDATE.
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._pending or db.pool is None:
+                return
+            batch, self._pending = self._pending, Counter()
+            recipe_ids = sorted(batch)
+            try:
+                async with db.pool.acquire() as connection:
+                    await recipes_repo.add_views(connection, recipe_ids, [batch[i] for i in recipe_ids])
+            except BaseException:
+                # Keep the counts for the next attempt (or the final flush) instead of losing them.
+                self._pending.update(batch)
+                raise
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush recipe views")
+
+
+view_counter = ViewCounter(VIEWS_FLUSH_INTERVAL, VIEWS_MAX_PENDING)
@@ -0,0 +1,81 @@
+"""
+Compare response serialization paths for a page of hydrated recipes.
+
+    python -m app.tools.bench_serialization [--recipes 50] [--rounds 2000]
+
+``validate_then_json_dumps`` is what older FastAPI releases do with a
+``response_model``, ``validate_then_dump_json`` is the current FastAPI path and
+``rows_dump_json`` is app.core.serialization.json_response. All three must
+produce the same bytes.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+from datetime import datetime
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.schemas import Recipe, RecipeRow
+from app.services.images import image_variants
+
+MODELS = TypeAdapter(List[Recipe])
+ROWS = TypeAdapter(List[RecipeRow])
+
+
+def _sample(count: int) -> list[dict]:
+    return [
+        {
+            "views": i * 7,
+            "id": i,
+            "author_id": i % 13,
+            "pub_date": datetime(2024, 1, 1, 12, 0),
+            "name": f"Рецепт {i}",
+            "image": f"/media/recipes/{i}.png",
+            "image_variants": image_variants(f"/media/recipes/{i}.png"),
+            "text": "Нарежьте, смешайте и запекайте до готовности. " * 40,
+            "cooking_time": 45,
+            "tags": ["завтрак", "быстро", "вегетарианское"],
+            "ingredients": [{"ingredient_id": j, "amount": 100 + j} for j in range(12)],
+            # Columns the services carry along but the response omits.
+            "version": 3,
+            "popularity_score": 0.25,
+        }
+        for i in range(count)
+    ]
+
+
+def validate_then_json_dumps(rows: list[dict]) -> bytes:
+    content = MODELS.dump_python(MODELS.validate_python(rows), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def validate_then_dump_json(rows: list[dict]) -> bytes:
+    return MODELS.dump_json(MODELS.validate_python(rows))
+
+
+def rows_dump_json(rows: list[dict]) -> bytes:
+    return ROWS.dump_json(rows)
+
+
+def main(recipes: int, rounds: int) -> None:
+    rows = _sample(recipes)
+    expected = validate_then_dump_json(rows)
+    baseline = None
+    print(f"{recipes} recipes, {len(expected)} bytes per response")
+    for fn in (validate_then_json_dumps, validate_then_dump_json, rows_dump_json):
+        if fn(rows) != expected:
+            raise SystemExit(f"{fn.__name__} produced different JSON")
+        per_call = timeit.timeit(lambda: fn(rows), number=rounds) / rounds * 1e6
+        baseline = baseline or per_call
+        print(f"{fn.__name__:<26} {per_call:8.1f} us/response  x{baseline / per_call:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.tools.bench_serialization")
+    parser.add_argument("--recipes", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.recipes, args.rounds)
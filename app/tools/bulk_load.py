@@ -0,0 +1,219 @@
+"""
+Load recipes (with their authors, tags and ingredients) from a JSONL or CSV file.
+
+    python -m app.tools.bulk_load recipes.jsonl [--batch-size 5000]
+
+JSONL lines look like::
+
+    {"author": {"email": "...", "username": "...", "first_name": "...", "last_name": "..."},
+     "name": "...", "text": "...", "cooking_time": 30, "image": "/media/...", "pub_date": "2024-01-01T12:00:00",
+     "tags": ["завтрак"], "ingredients": [{"name": "мука", "measurement_unit": "г", "amount": 200}]}
+
+CSV files use the columns author_email, author_username, author_first_name, author_last_name, name, text,
+cooking_time, image, pub_date, tags (``a;b``) and ingredients (``name:unit:amount;...``).
+
+Authors are matched by email, tags and ingredients by name; missing ones are created. Imported users get
+an unusable password. Each batch is staged with COPY and merged in its own transaction, so re-running a
+file that was partly loaded duplicates the recipes that already made it in.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Iterator
+
+import asyncpg
+
+from app.db import DATABASE_URL
+from app.repositories import bulk_load as bulk_repo
+
+UNUSABLE_PASSWORD = "!"
+
+
+def _read_jsonl(path: str) -> Iterator[tuple[int, str]]:
+    with open(path, encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, start=1):
+            if line.strip():
+                yield line_no, line
+
+
+def _read_csv(path: str) -> Iterator[tuple[int, dict]]:
+    with open(path, encoding="utf-8", newline="") as fh:
+        yield from enumerate(csv.DictReader(fh), start=2)
+
+
+def _parse_csv_row(row: dict) -> dict:
+    ingredients = []
+    for part in filter(None, (row.get("ingredients") or "").split(";")):
+        name, unit, amount = part.rsplit(":", 2)
+        ingredients.append({"name": name, "measurement_unit": unit, "amount": amount})
+    return {
+        "author": {
+            "email": row.get("author_email"),
+            "username": row.get("author_username"),
+            "first_name": row.get("author_first_name"),
+            "last_name": row.get("author_last_name"),
+        },
+        "name": row.get("name"),
+        "text": row.get("text"),
+        "cooking_time": row.get("cooking_time"),
+        "image": row.get("image"),
+        "pub_date": row.get("pub_date") or None,
+        "tags": (row.get("tags") or "").split(";"),
+        "ingredients": ingredients,
+    }
+
+
+def _text(value, field: str, max_length: int, *, required: bool = True) -> str:
+    """Check a value against its VARCHAR column here, so a bad line is skipped rather than failing the batch."""
+    if value is None:
+        if required:
+            raise ValueError(f"{field} is required")
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    value = value.strip()
+    if required and not value:
+        raise ValueError(f"{field} is required")
+    if len(value) > max_length:
+        raise ValueError(f"{field} is longer than {max_length} characters")
+    return value
+
+
+def _pub_date(value) -> datetime | None:
+    if not value:
+        return None
+    pub_date = datetime.fromisoformat(value)
+    if pub_date.tzinfo is not None:
+        # recipes.pub_date is TIMESTAMP WITHOUT TIME ZONE holding UTC, like NOW() on the server.
+        pub_date = pub_date.astimezone(timezone.utc).replace(tzinfo=None)
+    if pub_date > datetime.now(timezone.utc).replace(tzinfo=None):
+        raise ValueError("pub_date is in the future")
+    return pub_date
+
+
+def _normalize(record: dict) -> dict:
+    author = record["author"]
+    email = _text(author.get("email"), "email", 254)
+    cooking_time = int(record["cooking_time"])
+    if not 1 <= cooking_time <= 32000:
+        raise ValueError("cooking_time must be between 1 and 32000")
+
+    ingredients: dict[str, tuple[str, int]] = {}
+    for item in record.get("ingredients") or []:
+        amount = int(item["amount"])
+        if not 1 <= amount <= 32000:
+            raise ValueError("amount must be between 1 and 32000")
+        name = _text(item.get("name"), "ingredient name", 128)
+        ingredients[name] = (_text(item.get("measurement_unit"), "measurement_unit", 64), amount)
+
+    text = record.get("text") or ""
+    if not isinstance(text, str):
+        raise ValueError("text must be a string")
+
+    tags = []
+    for tag in record.get("tags") or []:
+        tag = _text(tag, "tag", 256, required=False).lower()
+        if tag:
+            tags.append(tag)
+
+    return {
+        "user": (
+            email,
+            _text(author.get("username"), "username", 150, required=False) or email[:150],
+            _text(author.get("first_name"), "first_name", 150, required=False),
+            _text(author.get("last_name"), "last_name", 150, required=False),
+            _text(author.get("password_hash"), "password_hash", 255, required=False) or UNUSABLE_PASSWORD,
+        ),
+        "recipe": (
+            email,
+            _text(record.get("name"), "name", 256),
+            _text(record.get("image"), "image", 255, required=False),
+            text,
+            cooking_time,
+            _pub_date(record.get("pub_date")),
+        ),
+        "tags": list(dict.fromkeys(tags)),
+        "ingredients": ingredients,
+    }
+
+
+def _valid_records(rows: Iterable[tuple[int, Any]], parse: Callable[[Any], dict]) -> Iterator[dict]:
+    """Parse and normalize each line; a line that fails either step is reported and skipped."""
+    for line_no, raw in rows:
+        try:
+            yield _normalize(parse(raw))
+        except (KeyError, TypeError, ValueError, AttributeError) as exc:
+            print(f"line {line_no}: skipped ({exc!r})", file=sys.stderr)
+
+
+async def _load_batch(connection: asyncpg.Connection, batch: list[dict]) -> dict[str, int]:
+    async with connection.transaction():
+        recipe_ids = await bulk_repo.allocate_recipe_ids(connection, len(batch))
+        users, recipes, recipe_tags, recipe_ingredients = [], [], [], []
+        for recipe_id, item in zip(recipe_ids, batch):
+            users.append(item["user"])
+            recipes.append((recipe_id, *item["recipe"]))
+            recipe_tags.extend((recipe_id, name) for name in item["tags"])
+            recipe_ingredients.extend(
+                (recipe_id, name, unit, amount) for name, (unit, amount) in item["ingredients"].items()
+            )
+        await bulk_repo.copy_batch(connection, users, recipes, recipe_tags, recipe_ingredients)
+        return await bulk_repo.merge_batch(connection)
+
+
+async def main(path: str, fmt: str, batch_size: int) -> None:
+    if fmt == "csv":
+        records = _valid_records(_read_csv(path), _parse_csv_row)
+    else:
+        records = _valid_records(_read_jsonl(path), json.loads)
+    totals: dict[str, int] = {}
+    read = 0
+    started = time.perf_counter()
+
+    connection = await asyncpg.connect(DATABASE_URL)
+    try:
+        await bulk_repo.create_staging(connection)
+        while batch := list(itertools.islice(records, batch_size)):
+            inserted = await _load_batch(connection, batch)
+            read += len(batch)
+            for table, count in inserted.items():
+                totals[table] = totals.get(table, 0) + count
+            elapsed = time.perf_counter() - started
+            rows = sum(totals.values())
+            print(f"{read} records read, {rows} rows written, {rows / elapsed:.0f} rows/sec")
+    finally:
+        await connection.close()
+
+    elapsed = time.perf_counter() - started
+    for table, count in totals.items():
+        print(f"{table}: {count} inserted")
+    skipped = read - totals.get("recipes", 0)
+    if skipped:
+        print(f"recipes: {skipped} skipped (author could not be created, e.g. username taken)")
+    print(f"done in {elapsed:.1f}s")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.bulk_load",
+        description="Bulk-load recipes from a JSONL or CSV file.",
+    )
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+    if args.format is None:
+        args.format = "csv" if args.path.lower().endswith(".csv") else "jsonl"
+    return args
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    asyncio.run(main(args.path, args.format, args.batch_size))
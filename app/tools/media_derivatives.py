@@ -0,0 +1,61 @@
+"""
+Render the resized WebP derivatives for images already in media/.
+
+    python -m app.tools.media_derivatives [--workers 4] [--force]
+
+New uploads get their derivatives from the background worker; this covers
+files stored before it existed or jobs it dropped. Images that already have
+every derivative are skipped unless ``--force`` is given.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator
+
+from app.services.files import MEDIA_ROOT
+from app.services.images import DERIVATIVE_SUBDIRS, is_derivative, render_variants
+
+
+def _originals() -> Iterator[Path]:
+    for subdir in DERIVATIVE_SUBDIRS:
+        for dirpath, _, filenames in os.walk(MEDIA_ROOT / subdir):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                if path.suffix != ".tmp" and not is_derivative(path):
+                    yield path
+
+
+def main(workers: int, force: bool) -> None:
+    started = time.perf_counter()
+    scanned = written = failed = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(render_variants, str(path), force): path for path in _originals()}
+        for future in as_completed(futures):
+            scanned += 1
+            try:
+                written += future.result()
+            except Exception as exc:
+                failed += 1
+                print(f"{futures[future]}: failed ({exc!r})")
+    print(f"{scanned} images scanned, {written} derivatives written, {failed} failed")
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.media_derivatives",
+        description="Backfill resized WebP derivatives for stored images.",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="re-render derivatives that already exist")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(args.workers, args.force)
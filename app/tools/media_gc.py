@@ -0,0 +1,91 @@
+"""
+Delete media files that no user, recipe or comment references any more.
+
+    python -m app.tools.media_gc [--grace-hours 24] [--dry-run]
+
+Derivatives (see app.services.images) live as long as their original.
+Files are written before the row that points at them commits, so anything
+modified within the grace period is kept. Leftover ``.tmp`` files from
+interrupted writes are removed once they are older than the grace period too.
+Empty shard directories are left in place: a concurrent upload may be about to
+move a file into one.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+import asyncpg
+
+from app.db import DATABASE_URL
+from app.repositories import media as media_repo
+from app.services.files import MEDIA_ROOT
+from app.services.images import image_variants
+
+MEDIA_SUBDIRS = ("avatars", "recipes", "comments")
+
+
+def _expired_size(path: Path, cutoff: float) -> Optional[int]:
+    """Size of ``path`` if it was last modified before ``cutoff``; None if newer or already gone."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        # Renamed or removed by a concurrent write since os.walk listed it.
+        return None
+    return stat.st_size if stat.st_mtime <= cutoff else None
+
+
+def _sweep(referenced: set[str], cutoff: float, dry_run: bool) -> tuple[int, int, int]:
+    kept = removed = freed = 0
+    for subdir in MEDIA_SUBDIRS:
+        root = MEDIA_ROOT / subdir
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                url = "/media/" + path.relative_to(MEDIA_ROOT).as_posix()
+                # Stat just before deleting: an upload may have touched the blob to reuse it.
+                size = None if url in referenced else _expired_size(path, cutoff)
+                if size is None:
+                    kept += 1
+                    continue
+                removed += 1
+                freed += size
+                if not dry_run:
+                    path.unlink(missing_ok=True)
+    return kept, removed, freed
+
+
+async def main(grace_hours: float, dry_run: bool) -> None:
+    # Take the cutoff before reading references so a file written later is always inside the grace period.
+    cutoff = time.time() - grace_hours * 3600
+    connection = await asyncpg.connect(DATABASE_URL)
+    try:
+        referenced = await media_repo.list_referenced(connection)
+    finally:
+        await connection.close()
+    for url in list(referenced):
+        referenced.update((image_variants(url) or {}).values())
+
+    kept, removed, freed = await asyncio.to_thread(_sweep, referenced, cutoff, dry_run)
+    action = "would remove" if dry_run else "removed"
+    print(f"{len(referenced)} referenced urls (with derivatives), {kept} files kept")
+    print(f"{action} {removed} files ({freed / 1024 / 1024:.1f} MB)")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.media_gc",
+        description="Remove unreferenced media files.",
+    )
+    parser.add_argument("--grace-hours", type=float, default=24)
+    parser.add_argument("--dry-run", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    asyncio.run(main(args.grace_hours, args.dry_run))
@@ -0,0 +1,30 @@
+"""
+Rebuild the trigger-maintained statistics counters from the source tables.
+
+    python -m app.tools.reconcile_stats
+"""
+from __future__ import annotations
+
+import asyncio
+
+import asyncpg
+
+from app.db import DATABASE_URL
+from app.repositories import author_stats as author_stats_repo
+from app.repositories import recipe_stats as recipe_stats_repo
+
+
+async def main() -> None:
+    connection = await asyncpg.connect(DATABASE_URL)
+    try:
+        async with connection.transaction():
+            recipes = await recipe_stats_repo.rebuild(connection)
+            authors = await author_stats_repo.rebuild(connection)
+    finally:
+        await connection.close()
+    print(f"recipe_stats: {recipes} recipes reconciled")
+    print(f"author_stats: {authors} authors reconciled")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())